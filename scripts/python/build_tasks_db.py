@@ -53,7 +53,8 @@ def stable_task_uid(story_slug, task_id, title, position):
     if not identifier:
         identifier = f"pos:{position}"
     key = f"{slug}|{identifier}|{normalise_title(title)}"
-    return hashlib.sha1(key.encode("utf-8", "replace")).hexdigest()
+    # Must match progress_migration._stable_uid so rebuilds and migrations agree.
+    return hashlib.blake2b(key.encode("utf-8", "replace"), digest_size=20, person=b"gptc-mig").hexdigest()
 
 
 def parse_tasks(tasks_json_path: Path) -> tuple[list, str]:
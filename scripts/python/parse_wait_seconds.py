@@ -22,11 +22,21 @@ UNITS = {
     "s": 1,
 }
 
+# Matched against the lower-cased message, so every unit found is a UNITS key.
+WAIT_PATTERN = re.compile(
+    r"(\d+)\s*(hour|hours|hr|hrs|h|minute|minutes|min|mins|m|second|seconds|sec|secs|s)"
+)
+DIGITS = frozenset("0123456789")
+
 
 def parse_wait(message: str) -> int:
     message = (message or "").lower()
+    # \d also matches non-ASCII decimal digits, so only pure-ASCII text can be
+    # ruled out by looking for 0-9.
+    if message.isascii() and DIGITS.isdisjoint(message):
+        return 0
     total = 0
-    for value, unit in re.findall(r"(\d+)\s*(hour|hours|hr|hrs|h|minute|minutes|min|mins|m|second|seconds|sec|secs|s)", message):
+    for value, unit in WAIT_PATTERN.findall(message):
         total += int(value) * UNITS[unit]
     return total
 
@@ -5,15 +5,21 @@ from __future__ import annotations
 
 import argparse
 import datetime as _dt
+import functools
 import hashlib
 import json
 import sqlite3
 import sys
 import time
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-TERMINAL_STATUSES = {
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None  # type: ignore[assignment]
+
+TERMINAL_STATUSES = frozenset({
     "complete",
     "completed",
     "completed-no-changes",
@@ -23,7 +29,7 @@ TERMINAL_STATUSES = {
     "blocked-schema-drift",
     "blocked-schema-guard-error",
     "skipped-already-complete",
-}
+})
 
 AUDIT_COLUMNS: Tuple[str, ...] = (
     "uid",
@@ -58,7 +64,34 @@ AUDIT_SELECT_COLUMNS: Tuple[str, ...] = (
     "reopened_by_migration_at",
 )
 
+# Stored in PRAGMA user_version once _ensure_schema has run; bump whenever
+# the tables, columns or indexes it creates change.
+CURRENT_SCHEMA_VERSION = 1
+
+# Stay below SQLite's historical 999 bound-variable limit for IN (...) lists.
+SQLITE_MAX_INLINE_PARAMS = 900
+
+# Audit and snapshot rows are written in chunks to bound memory on large plans.
+AUDIT_FLUSH_ROWS = 5000
+
+
+# Parameterised once; copying a primed state is much cheaper than building a
+# personalised BLAKE2b per row. 20-byte digests match the SHA-1 length they replaced.
+_UID_HASH_PROTO = hashlib.blake2b(digest_size=20, person=b"gptc-mig")
+
 
+def _hasher(data: bytes = b"") -> "hashlib.blake2b":
+    hasher = _UID_HASH_PROTO.copy()
+    if data:
+        hasher.update(data)
+    return hasher
+
+
+def _now_iso() -> str:
+    return _dt.datetime.now(_dt.timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+@functools.lru_cache(maxsize=512)
 def _is_terminal(status: Optional[str]) -> bool:
     text = (status or "").strip().lower()
     return text in TERMINAL_STATUSES or text.startswith("blocked-dependency(")
@@ -70,6 +103,11 @@ def _normalise_title(value: Optional[str]) -> str:
     return " ".join(value.strip().lower().split())
 
 
+@functools.lru_cache(maxsize=64)
+def _locked_norm(value: Optional[str]) -> str:
+    return (value or "").strip().lower()
+
+
 def _stable_uid(story_slug: str, task_id: Optional[str], title: Optional[str], position: int) -> str:
     slug = (story_slug or "").strip().lower()
     identifier = (task_id or "").strip().lower()
@@ -77,11 +115,21 @@ def _stable_uid(story_slug: str, task_id: Optional[str], title: Optional[str], p
     if not identifier:
         identifier = f"pos:{position}"
     key = f"{slug}|{identifier}|{title_norm}"
-    digest = hashlib.sha1(key.encode("utf-8", "replace")).hexdigest()
-    return digest
+    return _hasher(key.encode("utf-8", "replace")).hexdigest()
+
+
+def _has_index_prefix(cur: sqlite3.Cursor, table: str, columns: Tuple[str, ...]) -> bool:
+    for index in cur.execute(f"PRAGMA index_list({table})").fetchall():
+        index_columns = [row["name"] for row in cur.execute(f"PRAGMA index_info({index['name']})").fetchall()]
+        if tuple(index_columns[: len(columns)]) == columns:
+            return True
+    return False
 
 
 def _ensure_schema(cur: sqlite3.Cursor) -> None:
+    if cur.execute("PRAGMA user_version").fetchone()[0] >= CURRENT_SCHEMA_VERSION:
+        return
+
     cur.execute(
         """
         CREATE TABLE IF NOT EXISTS task_id_map(
@@ -117,6 +165,15 @@ def _ensure_schema(cur: sqlite3.Cursor) -> None:
         """
     )
 
+    # Let _fetch_tasks walk an index instead of sorting. Databases built by
+    # build_tasks_db already get one from UNIQUE(story_slug, position).
+    if not _has_index_prefix(cur, "tasks", ("story_slug", "position")):
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_tasks_story_slug_pos ON tasks(story_slug, position)
+            """
+        )
+
     cur.execute(
         """
         CREATE TABLE IF NOT EXISTS progress_migration_journal (
@@ -170,8 +227,13 @@ def _ensure_schema(cur: sqlite3.Cursor) -> None:
         """
     )
 
+    cur.execute(f"PRAGMA user_version = {CURRENT_SCHEMA_VERSION}")
+
 
-def _fetch_tasks(cur: sqlite3.Cursor) -> List[sqlite3.Row]:
+def _fetch_tasks(cur: sqlite3.Cursor) -> Iterator[Tuple[Any, ...]]:
+    # Plain tuples skip sqlite3.Row construction; _build_plan unpacks them positionally.
+    task_cur = cur.connection.cursor()
+    task_cur.row_factory = None
     query = """
         SELECT
           id,
@@ -191,27 +253,16 @@ def _fetch_tasks(cur: sqlite3.Cursor) -> List[sqlite3.Row]:
         FROM tasks
         ORDER BY story_slug, position
     """
-    return list(cur.execute(query))
-
-
-def _rows_checksum(rows: Sequence[sqlite3.Row]) -> str:
-    hasher = hashlib.sha1()
-    for row in rows:
-        values = [
-            row["story_slug"],
-            str(row["position"]),
-            row["task_id"] or "",
-            row["title"] or "",
-            row["status"] or "",
-            row["uid"] or "",
-        ]
-        hasher.update("|".join(values).encode("utf-8", "replace"))
-        hasher.update(b"\x00")
-    return hasher.hexdigest()
+    task_cur.execute(query)
+    while True:
+        batch = task_cur.fetchmany(1000)
+        if not batch:
+            break
+        yield from batch
 
 
 def _entries_checksum(entries: Sequence[Dict[str, Any]]) -> str:
-    hasher = hashlib.sha1()
+    hasher = _hasher()
     for entry in sorted(
         entries,
         key=lambda item: (
@@ -232,24 +283,59 @@ def _entries_checksum(entries: Sequence[Dict[str, Any]]) -> str:
     return hasher.hexdigest()
 
 
-def _build_plan(rows: Sequence[sqlite3.Row], epoch: int) -> Dict[str, object]:
+def _build_plan(rows: Iterable[Sequence[Any]], epoch: int) -> Dict[str, object]:
     per_story: Dict[str, Dict[str, int]] = {}
     entries: List[Dict[str, object]] = []
+    tasks_total = 0
     tasks_needing_update = 0
     tasks_marked_terminal = 0
-
-    for row in rows:
-        story = row["story_slug"]
-        per_story.setdefault(story, {"count": 0, "changes": 0})
-        per_story[story]["count"] += 1
-        uid_current = (row["uid"] or "").strip()
-        new_uid = _stable_uid(story, row["task_id"], row["title"], row["position"])
+    dataset_hasher = _hasher()
+    update_dataset = dataset_hasher.update
+    stable_uid = _stable_uid
+    is_terminal = _is_terminal
+    locked_norm = _locked_norm
+    append_entry = entries.append
+
+    for (
+        task_db_id,
+        story,
+        position,
+        task_id,
+        title,
+        carry_status,
+        carry_reason,
+        evidence_ptr,
+        doc_refs,
+        last_verified_commit,
+        uid_raw,
+        _migration_epoch,
+        locked_by_migration,
+        locked_by_raw,
+    ) in rows:
+        tasks_total += 1
+        update_dataset(
+            "|".join(
+                (
+                    story,
+                    str(position),
+                    task_id or "",
+                    title or "",
+                    carry_status or "",
+                    uid_raw or "",
+                )
+            ).encode("utf-8", "replace")
+        )
+        update_dataset(b"\x00")
+        story_stats = per_story.get(story)
+        if story_stats is None:
+            story_stats = per_story[story] = {"count": 0, "changes": 0}
+        story_stats["count"] += 1
+        uid_current = (uid_raw or "").strip()
+        new_uid = stable_uid(story, task_id, title, position)
         needs_uid_update = uid_current != new_uid
-        carry_status = row["status"]
-        carry_reason = row["status_reason"]
-        terminal = _is_terminal(carry_status)
-        locked_flag = int(row["locked_by_migration"] or 0)
-        locked_by = (row["locked_by"] or "").strip().lower()
+        terminal = is_terminal(carry_status)
+        locked_flag = int(locked_by_migration or 0)
+        locked_by = locked_norm(locked_by_raw)
         target_lock = 1 if terminal else 0
         lock_flag_change = locked_flag != target_lock
         needs_locked_by_update = False
@@ -271,42 +357,42 @@ def _build_plan(rows: Sequence[sqlite3.Row], epoch: int) -> Dict[str, object]:
         if not changes:
             continue
 
-        per_story[story]["changes"] += 1
+        story_stats["changes"] += 1
         tasks_needing_update += 1
-        entries.append(
+        append_entry(
             {
-                "task_db_id": row["id"],
+                "task_db_id": task_db_id,
                 "story_slug": story,
-                "position": row["position"],
-                "task_id": row["task_id"],
-                "title": row["title"],
+                "position": position,
+                "task_id": task_id,
+                "title": title,
                 "old_uid": uid_current,
                 "new_uid": new_uid,
                 "status": carry_status,
                 "status_reason": carry_reason,
-                "evidence_ptr": row["evidence_ptr"],
-                "doc_refs": row["doc_refs"],
-                "last_verified_commit": row["last_verified_commit"],
+                "evidence_ptr": evidence_ptr,
+                "doc_refs": doc_refs,
+                "last_verified_commit": last_verified_commit,
                 "terminal": terminal,
                 "target_lock": target_lock,
                 "current_lock": locked_flag,
-                "locked_by": row["locked_by"],
+                "locked_by": locked_by_raw,
                 "changes": changes,
             }
         )
-    dataset_checksum = _rows_checksum(rows)
+    dataset_checksum = dataset_hasher.hexdigest()
     entries_checksum = _entries_checksum(entries)
-    combined_checksum = hashlib.sha1(
+    combined_checksum = _hasher(
         f"{dataset_checksum}|{entries_checksum}".encode("utf-8", "replace")
     ).hexdigest()
 
     plan = {
         "epoch": epoch,
-        "generated_at": _dt.datetime.utcnow().replace(microsecond=0).isoformat() + "Z",
+        "generated_at": _now_iso(),
         "checksum": combined_checksum,
         "dataset_checksum": dataset_checksum,
         "entries_checksum": entries_checksum,
-        "tasks_total": len(rows),
+        "tasks_total": tasks_total,
         "tasks_needing_update": tasks_needing_update,
         "tasks_marked_terminal": tasks_marked_terminal,
         "stories": per_story,
@@ -316,19 +402,24 @@ def _build_plan(rows: Sequence[sqlite3.Row], epoch: int) -> Dict[str, object]:
 
 def write_plan(plan: Dict[str, object], path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(plan, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE))
+        return
     path.write_text(json.dumps(plan, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
 
 
 def load_plan(path: Path) -> Dict[str, object]:
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
     return json.loads(path.read_text(encoding="utf-8"))
 
 
 def append_mapping_rows(map_path: Path, epoch: int, entries: Iterable[Dict[str, object]]) -> None:
     map_path.parent.mkdir(parents=True, exist_ok=True)
-    timestamp = _dt.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
-    with map_path.open("a", encoding="utf-8") as handle:
-        for entry in entries:
-            row = {
+    timestamp = _now_iso()
+    lines = [
+        _dumps_compact(
+            {
                 "ts": timestamp,
                 "epoch": epoch,
                 "story_slug": entry["story_slug"],
@@ -341,7 +432,12 @@ def append_mapping_rows(map_path: Path, epoch: int, entries: Iterable[Dict[str,
                 "status_reason": entry["status_reason"],
                 "terminal": entry["terminal"],
             }
-            handle.write(json.dumps(row, ensure_ascii=False) + "\n")
+        )
+        + "\n"
+        for entry in entries
+    ]
+    with map_path.open("a", encoding="utf-8") as handle:
+        handle.writelines(lines)
 
 
 def _plan_already_applied(cur: sqlite3.Cursor, checksum: str) -> bool:
@@ -358,6 +454,12 @@ def _plan_already_applied(cur: sqlite3.Cursor, checksum: str) -> bool:
     return cur.fetchone() is not None
 
 
+def _dumps_compact(value: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(value).decode("utf-8")
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
 def _serialise_state(row: sqlite3.Row) -> Dict[str, Any]:
     payload: Dict[str, Any] = {}
     for column in AUDIT_COLUMNS:
@@ -368,11 +470,97 @@ def _serialise_state(row: sqlite3.Row) -> Dict[str, Any]:
     return payload
 
 
+def _tune_connection(conn: sqlite3.Connection) -> None:
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -65536")
+    try:
+        conn.execute("PRAGMA mmap_size = 268435456")
+    except sqlite3.DatabaseError:
+        pass
+    conn.execute("PRAGMA busy_timeout = 8000")
+
+
+_UPDATE_SQL_CACHE: Dict[Tuple[str, ...], str] = {}
+
+
+def _update_sql(shape: Tuple[str, ...]) -> str:
+    sql = _UPDATE_SQL_CACHE.get(shape)
+    if sql is None:
+        set_clause = ", ".join(f"{column} = ?" for column in shape)
+        sql = _UPDATE_SQL_CACHE.setdefault(
+            shape,
+            f"UPDATE tasks SET {set_clause}, migration_epoch = ? WHERE id = ?",
+        )
+    return sql
+
+
+def _fetch_current_rows(cur: sqlite3.Cursor, task_ids: Sequence[int]) -> Dict[int, sqlite3.Row]:
+    if not task_ids:
+        return {}
+    if len(task_ids) < SQLITE_MAX_INLINE_PARAMS:
+        select_columns = ", ".join(AUDIT_SELECT_COLUMNS)
+        placeholders = ", ".join("?" for _ in task_ids)
+        cur.execute(
+            f"SELECT {select_columns} FROM tasks WHERE id IN ({placeholders})",
+            tuple(task_ids),
+        )
+        return {row["id"]: row for row in cur}
+
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS _mig_ids(id INTEGER PRIMARY KEY)")
+    cur.execute("DELETE FROM _mig_ids")
+    cur.executemany("INSERT OR IGNORE INTO _mig_ids(id) VALUES (?)", ((task_id,) for task_id in task_ids))
+    joined_columns = ", ".join(f"t.{column}" for column in AUDIT_SELECT_COLUMNS)
+    cur.execute(f"SELECT {joined_columns} FROM tasks t JOIN _mig_ids m ON m.id = t.id")
+    current_by_id = {row["id"]: row for row in cur}
+    cur.execute("DROP TABLE _mig_ids")
+    return current_by_id
+
+
+def _flush_audit(
+    cur: sqlite3.Cursor,
+    audit_rows: List[Tuple[Any, ...]],
+    snapshot_rows: List[Tuple[Any, ...]],
+) -> None:
+    if snapshot_rows:
+        cur.executemany(
+            """
+            INSERT OR IGNORE INTO progress_migration_snapshots(
+                plan_checksum,
+                task_id,
+                before_state,
+                captured_at
+            ) VALUES (?, ?, ?, ?)
+            """,
+            snapshot_rows,
+        )
+
+    if audit_rows:
+        cur.executemany(
+            """
+            INSERT INTO progress_migration_audit(
+                plan_checksum,
+                task_id,
+                story_slug,
+                task_position,
+                before_state,
+                after_state,
+                changed_fields,
+                applied_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            audit_rows,
+        )
+    audit_rows.clear()
+    snapshot_rows.clear()
+
+
 def apply_plan(db_path: Path, plan: Dict[str, object], map_path: Optional[Path]) -> Dict[str, int]:
     conn = sqlite3.connect(str(db_path))
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON")
-    conn.execute("PRAGMA journal_mode = WAL")
+    _tune_connection(conn)
     cur = conn.cursor()
     _ensure_schema(cur)
 
@@ -388,7 +576,7 @@ def apply_plan(db_path: Path, plan: Dict[str, object], map_path: Optional[Path])
         "states_reopened": 0,
     }
 
-    applied_at = _dt.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+    applied_at = _now_iso()
 
     if not entries:
         if plan_checksum:
@@ -430,7 +618,6 @@ def apply_plan(db_path: Path, plan: Dict[str, object], map_path: Optional[Path])
         return stats
 
     cur.execute("PRAGMA locking_mode = EXCLUSIVE")
-    cur.execute("PRAGMA busy_timeout = 8000")
     cur.execute("PRAGMA defer_foreign_keys = 1")
 
     if plan_checksum and _plan_already_applied(cur, plan_checksum):
@@ -440,17 +627,18 @@ def apply_plan(db_path: Path, plan: Dict[str, object], map_path: Optional[Path])
     audit_rows: List[Tuple[Any, ...]] = []
     snapshot_rows: List[Tuple[Any, ...]] = []
     updated_entries: List[Dict[str, Any]] = []
+    update_runs: List[Tuple[Tuple[str, ...], List[Tuple[Any, ...]]]] = []
+    map_rows: List[Tuple[Any, ...]] = []
 
     try:
+        # Read the rows under the writer lock so the updates and audit
+        # before-states cannot be based on values another writer has changed.
         conn.execute("BEGIN IMMEDIATE")
-        select_columns = ", ".join(AUDIT_SELECT_COLUMNS)
+        current_by_id = _fetch_current_rows(cur, [int(entry["task_db_id"]) for entry in entries])
         for entry in entries:
             stats["tasks_considered"] += 1
             task_db_id = int(entry["task_db_id"])
-            current = cur.execute(
-                f"SELECT {select_columns} FROM tasks WHERE id = ?",
-                (task_db_id,),
-            ).fetchone()
+            current = current_by_id.get(task_db_id)
             if current is None:
                 continue
 
@@ -466,66 +654,63 @@ def apply_plan(db_path: Path, plan: Dict[str, object], map_path: Optional[Path])
                 changed_fields.append("uid")
 
             status_now = current["status"]
-            lock_target = 1 if _is_terminal(status_now) else 0
+            if "target_lock" in entry and status_now == entry.get("status"):
+                # _build_plan set target_lock from this same status, so reuse it;
+                # a status changed since planning is classified again here.
+                lock_target = int(entry["target_lock"])
+            else:
+                lock_target = 1 if _is_terminal(status_now) else 0
             lock_current = int(current["locked_by_migration"] or 0)
-            locked_by_current_raw = current["locked_by"]
-            locked_by_current = (locked_by_current_raw or "").strip().lower()
+            locked_by_current = _locked_norm(current["locked_by"])
             reopened_current = int(current["reopened_by_migration"] or 0)
             reopened_at_current = current["reopened_by_migration_at"]
 
-            if lock_target != lock_current:
-                updates["locked_by_migration"] = lock_target
-                changed_fields.append("locked_by_migration")
+            if lock_target:
+                lock_settled = (
+                    lock_current == 1
+                    and locked_by_current == "migration"
+                    and not reopened_current
+                    and not reopened_at_current
+                )
+            else:
+                lock_settled = lock_current == 0 and locked_by_current != "migration" and bool(reopened_current)
 
-            if lock_target and locked_by_current != "migration":
-                updates["locked_by"] = "migration"
-                if "locked_by" not in changed_fields:
+            if not lock_settled:
+                if lock_target != lock_current:
+                    updates["locked_by_migration"] = lock_target
+                    changed_fields.append("locked_by_migration")
+
+                if lock_target and locked_by_current != "migration":
+                    updates["locked_by"] = "migration"
                     changed_fields.append("locked_by")
-            if not lock_target and locked_by_current == "migration":
-                updates["locked_by"] = None
-                if "locked_by" not in changed_fields:
+                if not lock_target and locked_by_current == "migration":
+                    updates["locked_by"] = None
                     changed_fields.append("locked_by")
 
-            if lock_target:
-                if reopened_current:
-                    updates["reopened_by_migration"] = 0
-                    if "reopened_by_migration" not in changed_fields:
+                if lock_target:
+                    if reopened_current:
+                        updates["reopened_by_migration"] = 0
                         changed_fields.append("reopened_by_migration")
-                if reopened_at_current:
-                    updates["reopened_by_migration_at"] = None
-                    if "reopened_by_migration_at" not in changed_fields:
+                    if reopened_at_current:
+                        updates["reopened_by_migration_at"] = None
                         changed_fields.append("reopened_by_migration_at")
-            else:
-                if not reopened_current:
+                elif not reopened_current:
                     updates["reopened_by_migration"] = 1
-                    if "reopened_by_migration" not in changed_fields:
-                        changed_fields.append("reopened_by_migration")
+                    changed_fields.append("reopened_by_migration")
                     updates["reopened_by_migration_at"] = applied_at
-                    if "reopened_by_migration_at" not in changed_fields:
-                        changed_fields.append("reopened_by_migration_at")
+                    changed_fields.append("reopened_by_migration_at")
 
             if not updates:
                 continue
 
+            shape = tuple(sorted(updates))
+            params = tuple(updates[column] for column in shape) + (epoch, task_db_id)
+            if update_runs and update_runs[-1][0] == shape:
+                update_runs[-1][1].append(params)
+            else:
+                update_runs.append((shape, [params]))
             updates["migration_epoch"] = epoch
 
-            set_clauses: List[str] = []
-            params: List[Any] = []
-            for column, value in updates.items():
-                if value is None:
-                    set_clauses.append(f"{column} = NULL")
-                else:
-                    set_clauses.append(f"{column} = ?")
-                    params.append(value)
-            params.append(task_db_id)
-
-            cur.execute(
-                f"UPDATE tasks SET {', '.join(set_clauses)} WHERE id = ?",
-                params,
-            )
-            if cur.rowcount == 0:
-                continue
-
             stats["tasks_updated"] += 1
             lock_after = updates.get("locked_by_migration", lock_current)
             if lock_after == lock_current:
@@ -539,9 +724,9 @@ def apply_plan(db_path: Path, plan: Dict[str, object], map_path: Optional[Path])
             for column, value in updates.items():
                 after_state[column] = value
 
-            before_json = json.dumps(before_state, ensure_ascii=False)
-            after_json = json.dumps(after_state, ensure_ascii=False)
-            changed_json = json.dumps(sorted(set(changed_fields)), ensure_ascii=False)
+            before_json = _dumps_compact(before_state)
+            after_json = _dumps_compact(after_state)
+            changed_json = _dumps_compact(sorted(set(changed_fields)))
 
             audit_rows.append(
                 (
@@ -563,59 +748,22 @@ def apply_plan(db_path: Path, plan: Dict[str, object], map_path: Optional[Path])
                     applied_at,
                 )
             )
+            if len(audit_rows) >= AUDIT_FLUSH_ROWS:
+                _flush_audit(cur, audit_rows, snapshot_rows)
 
             if desired_uid:
-                cur.execute(
-                    """
-                    INSERT INTO task_id_map(old_uid, new_uid, epoch, carried_status, carried_reason)
-                    VALUES(?, ?, ?, ?, ?)
-                    ON CONFLICT(old_uid) DO UPDATE SET
-                      new_uid = excluded.new_uid,
-                      epoch = excluded.epoch,
-                      carried_status = excluded.carried_status,
-                      carried_reason = excluded.carried_reason
-                    """,
+                map_rows.append(
                     (
                         old_uid or desired_uid,
                         desired_uid,
                         epoch,
                         entry.get("status"),
                         entry.get("status_reason"),
-                    ),
+                    )
                 )
 
             updated_entries.append(entry)
 
-        if snapshot_rows:
-            cur.executemany(
-                """
-                INSERT OR IGNORE INTO progress_migration_snapshots(
-                    plan_checksum,
-                    task_id,
-                    before_state,
-                    captured_at
-                ) VALUES (?, ?, ?, ?)
-                """,
-                snapshot_rows,
-            )
-
-        if audit_rows:
-            cur.executemany(
-                """
-                INSERT INTO progress_migration_audit(
-                    plan_checksum,
-                    task_id,
-                    story_slug,
-                    task_position,
-                    before_state,
-                    after_state,
-                    changed_fields,
-                    applied_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                audit_rows,
-            )
-
         checksum_source = json.dumps(
             {
                 "dataset": plan.get("dataset_checksum"),
@@ -624,6 +772,29 @@ def apply_plan(db_path: Path, plan: Dict[str, object], map_path: Optional[Path])
             ensure_ascii=False,
         )
 
+        # Rows were read inside this transaction, so every queued update is
+        # guaranteed to hit exactly one row. Only consecutive same-shape
+        # updates share a batch: tasks.uid is unique, and a uid released by
+        # one row may be claimed by a later row in plan order.
+        for shape, param_rows in update_runs:
+            cur.executemany(_update_sql(shape), param_rows)
+
+        if map_rows:
+            cur.executemany(
+                """
+                INSERT INTO task_id_map(old_uid, new_uid, epoch, carried_status, carried_reason)
+                VALUES(?, ?, ?, ?, ?)
+                ON CONFLICT(old_uid) DO UPDATE SET
+                  new_uid = excluded.new_uid,
+                  epoch = excluded.epoch,
+                  carried_status = excluded.carried_status,
+                  carried_reason = excluded.carried_reason
+                """,
+                map_rows,
+            )
+
+        _flush_audit(cur, audit_rows, snapshot_rows)
+
         if plan_checksum:
             cur.execute(
                 """
@@ -668,12 +839,14 @@ def apply_plan(db_path: Path, plan: Dict[str, object], map_path: Optional[Path])
 def plan_only(db_path: Path, plan_path: Path) -> Dict[str, object]:
     conn = sqlite3.connect(str(db_path))
     conn.row_factory = sqlite3.Row
+    _tune_connection(conn)
     cur = conn.cursor()
     _ensure_schema(cur)
-    rows = _fetch_tasks(cur)
-    conn.close()
     epoch = int(time.time())
-    plan = _build_plan(rows, epoch)
+    try:
+        plan = _build_plan(_fetch_tasks(cur), epoch)
+    finally:
+        conn.close()
     write_plan(plan, plan_path)
     return plan
 
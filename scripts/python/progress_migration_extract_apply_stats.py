@@ -4,6 +4,11 @@
 import json
 import sys
 
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None  # type: ignore[assignment]
+
 
 def main(argv: list[str]) -> None:
     if len(argv) != 2:
@@ -11,7 +16,7 @@ def main(argv: list[str]) -> None:
 
     raw = argv[1]
     try:
-        payload = json.loads(raw)
+        payload = orjson.loads(raw) if orjson is not None else json.loads(raw)
     except Exception:
         print("")
         return
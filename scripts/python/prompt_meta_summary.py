@@ -21,7 +21,7 @@ def main(argv):
 
     path = Path(argv[1])
     try:
-        data = json.loads(path.read_text(encoding="utf-8"))
+        data = json.loads(path.read_bytes())
     except Exception:
         print("ok\t0\t0\ttrue\t0\t0\t{}\t0\tmissing\tinvalid-meta")
         return
@@ -33,16 +33,15 @@ def main(argv):
     estimate = data.get("token_estimate_final") or 0
     pruned = data.get("pruned") or {}
     pruned_bytes = pruned.get("bytes") or 0
-    pruned_items = pruned.get("items") or {}
+    pruned_items = json.dumps(pruned.get("items") or {}, separators=(",", ":"))
     reserved = data.get("reserved_output") or 0
     binder = data.get("binder") or {}
     binder_status = binder.get("status") or ""
     binder_reason = binder.get("reason") or ""
 
-    print(
+    sys.stdout.write(
         f"{status}\t{soft}\t{hard}\t{stop}\t{estimate}\t{pruned_bytes}\t"
-        + json.dumps(pruned_items, separators=(",", ":"))
-        + f"\t{reserved}\t{binder_status}\t{binder_reason}"
+        f"{pruned_items}\t{reserved}\t{binder_status}\t{binder_reason}\n"
     )
 
 
@@ -9,63 +9,292 @@ without caring about the original project layout.
 
 from __future__ import annotations
 
+import json
 import os
 import shutil
+import stat
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Iterable, List, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ModuleNotFoundError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
 
 DEFAULT_REGISTRY_SUBDIR = Path("src") / "prompts" / "_registry"
 DEFAULT_SOURCE_DIRECTORIES = (
     Path("src") / "prompts",
     Path("docs"),
 )
+REGISTRY_MANIFEST_NAME = ".manifest.json"
+REGISTRY_MANIFEST_VERSION = 1
+# Directories modified this close to the manifest write may have changed again
+# within the same timestamp tick (FAT has 2 s resolution), so they are rescanned.
+RACY_MTIME_WINDOW_NS = 2_000_000_000
+FICLONE = 0x40049409  # Linux ioctl: share extents with another file (reflink)
+_DIR_FD_SUPPORTED = all(func in os.supports_dir_fd for func in (os.stat, os.unlink, os.symlink))
 
 
-def _relative_symlink(target: Path, link_path: Path) -> None:
+def _relative_symlink(target: str | Path, link_path: str | Path, dir_fd: Optional[int] = None) -> bool:
     """
-    Create a relative symlink if possible, fall back to copying on platforms
-    where symlinks are unavailable.
+    Create a relative symlink if possible, fall back to a hard link, reflink or
+    copy on platforms where symlinks are unavailable. Returns False when no
+    symlink was made.
+    The parent directory must already exist; when ``dir_fd`` refers to it,
+    only the final path component is resolved by the kernel.
     """
-    link_path.parent.mkdir(parents=True, exist_ok=True)
-    if link_path.exists() or link_path.is_symlink():
-        link_path.unlink()
+    parent, basename = os.path.split(os.fspath(link_path))
+    name = link_path if dir_fd is None else basename
+    try:
+        os.lstat(name, dir_fd=dir_fd)
+    except FileNotFoundError:
+        pass
+    else:
+        os.unlink(name, dir_fd=dir_fd)
     try:
-        relative_target = os.path.relpath(target, link_path.parent)
-        link_path.symlink_to(relative_target)
+        relative_target = os.path.relpath(target, parent)
+        os.symlink(relative_target, name, dir_fd=dir_fd)
     except (OSError, NotImplementedError):
-        shutil.copy2(target, link_path)
+        _link_or_copy(target, link_path)
+        return False
+    return True
+
+
+def _link_or_copy(target: str | Path, link_path: str | Path) -> None:
+    """
+    Fallback for filesystems without symlinks: hard link, then reflink, and
+    only copy the file contents as a last resort.
+    """
+    try:
+        os.link(target, link_path)
+        return
+    except OSError:
+        pass
+    if fcntl is not None:
+        try:
+            with open(target, "rb") as source, open(link_path, "wb") as destination:
+                fcntl.ioctl(destination.fileno(), FICLONE, source.fileno())
+            shutil.copystat(target, link_path)
+            return
+        except OSError:
+            try:
+                os.unlink(link_path)
+            except OSError:
+                pass
+    shutil.copy2(target, link_path)
+
+
+def _open_dir_fd(parent: str) -> Optional[int]:
+    if not _DIR_FD_SUPPORTED:
+        return None
+    try:
+        return os.open(parent, os.O_DIRECTORY | getattr(os, "O_PATH", os.O_RDONLY))
+    except OSError:
+        return None
+
+
+def _batch_symlink(entries: List[Tuple[str, str]]) -> bool:
+    """
+    Materialise every (target, link) pair once the full registry layout is known.
+    Returns True when every entry became a symlink.
+    """
+    grouped: Dict[str, List[Tuple[str, str]]] = {}
+    for target, link_path in entries:
+        grouped.setdefault(os.path.dirname(link_path), []).append((target, link_path))
+    all_linked = True
+    for parent, pairs in grouped.items():
+        os.makedirs(parent, exist_ok=True)
+        dir_fd = _open_dir_fd(parent)
+        try:
+            for target, link_path in pairs:
+                if not _relative_symlink(target, link_path, dir_fd):
+                    all_linked = False
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
+    return all_linked
+
+
+def _iter_md_files(
+    root: str,
+    skip: str | None = None,
+    dir_mtimes: Optional[Dict[str, int]] = None,
+    max_depth: Optional[int] = None,
+    ordered: bool = False,
+) -> Iterator[os.DirEntry]:
+    """
+    Yield markdown files under ``root`` using cached ``os.scandir`` entries.
+
+    Directories are walked breadth-first without recursion. Symlinked
+    directories are not followed (matching ``Path.rglob``) and the ``skip``
+    directory, typically the registry itself, is never descended into. When
+    ``dir_mtimes`` is given, each visited directory's mtime is recorded before
+    it is listed; ``max_depth`` stops descending below that many levels.
+
+    Entries come out in directory-listing order; pass ``ordered=True`` to sort
+    them by path when a stable sequence is required.
+    """
+    if ordered:
+        yield from sorted(_iter_md_files(root, skip, dir_mtimes, max_depth), key=lambda entry: entry.path)
+        return
+    pending: deque[Tuple[str, int]] = deque([(root, 0)])
+    while pending:
+        current, depth = pending.popleft()
+        descend = max_depth is None or depth < max_depth
+        try:
+            if dir_mtimes is not None:
+                dir_mtimes[current] = os.stat(current).st_mtime_ns
+            with os.scandir(current) as iterator:
+                for entry in iterator:
+                    if entry.is_dir(follow_symlinks=False):
+                        if descend and entry.path != skip:
+                            pending.append((entry.path, depth + 1))
+                    elif entry.name.endswith(".md") and entry.is_file():
+                        yield entry
+        except OSError:
+            continue
+
+
+def _index_source(source_root: Path, registry_str: str, ordered: bool = False) -> Dict[str, Any]:
+    """
+    Collect (identity key, relative path) pairs for markdown files under a source
+    root, together with the mtimes of every directory visited.
+    """
+    source_root_str = os.fspath(source_root)
+    strip = len(source_root_str) + 1
+    files: List[Tuple[str, str]] = []
+    dir_mtimes: Dict[str, int] = {}
+    for entry in _iter_md_files(source_root_str, registry_str, dir_mtimes, ordered=ordered):
+        # Source roots are already resolved, so only symlinked files need realpath.
+        key = os.path.realpath(entry.path) if entry.is_symlink() else os.path.normpath(entry.path)
+        files.append((key, entry.path[strip:]))
+    return {"files": files, "dirs": dir_mtimes}
+
+
+def _load_manifest(manifest_path: Path) -> Tuple[Dict[str, Any], int]:
+    """
+    Return the per-source records of a previous build and the manifest's mtime,
+    or ({}, 0) when unusable.
+    """
+    try:
+        written_ns = os.stat(manifest_path).st_mtime_ns
+        data = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}, 0
+    if not isinstance(data, dict) or data.get("version") != REGISTRY_MANIFEST_VERSION:
+        return {}, 0
+    # Copies do not follow their sources, so only symlinked registries may be reused.
+    if not data.get("symlinks"):
+        return {}, 0
+    roots = data.get("roots")
+    return (roots, written_ns) if isinstance(roots, dict) else ({}, 0)
+
+
+def _write_manifest(manifest_path: Path, roots: Dict[str, Any], symlinks: bool) -> None:
+    payload = {"version": REGISTRY_MANIFEST_VERSION, "symlinks": symlinks, "roots": roots}
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    tmp_path.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp_path, manifest_path)
+
+
+def _dirs_unchanged(dir_mtimes: Dict[str, int], manifest_written_ns: int) -> bool:
+    """
+    Directory mtimes move whenever an entry is added, removed or renamed, which
+    is all that decides the registry layout; file edits flow through symlinks.
+
+    As with git's racily-clean index entries, a recorded mtime within
+    RACY_MTIME_WINDOW_NS of the manifest write proves nothing on coarse
+    timestamps, so such directories count as changed.
+    """
+    if not dir_mtimes:
+        return False
+    racy_after_ns = manifest_written_ns - RACY_MTIME_WINDOW_NS
+    for path, mtime_ns in dir_mtimes.items():
+        if mtime_ns >= racy_after_ns:
+            return False
+        try:
+            if os.stat(path).st_mtime_ns != mtime_ns:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def _missing_links(registry_str: str, links: Iterable[Tuple[str, str, str]]) -> set[Tuple[str, str, str]]:
+    """
+    Return the recorded links that no longer exist in the registry, e.g. because
+    something else deleted them or their label directory.
+    """
+    label_present: Dict[str, bool] = {}
+    missing: set[Tuple[str, str, str]] = set()
+    for link in links:
+        _key, label, rel = link
+        label_dir = os.path.join(registry_str, label)
+        if label not in label_present:
+            label_present[label] = os.path.isdir(label_dir)
+        if not label_present[label] or not os.path.lexists(os.path.join(label_dir, rel)):
+            missing.add(link)
+    return missing
+
+
+def _dedupe_links(records: Iterable[Dict[str, Any]]) -> List[Tuple[str, str, str]]:
+    """
+    Flatten source records into (target key, label, relative path) in precedence order.
+    """
+    seen: set[str] = set()
+    links: List[Tuple[str, str, str]] = []
+    for record in records:
+        label = record["label"]
+        for key, rel in record["files"]:
+            if key in seen:
+                continue
+            seen.add(key)
+            links.append((key, label, rel))
+    return links
 
 
 def _normalise_source_roots(
     project_root: Path,
-    sources: Iterable[Path] | None,
+    sources: Iterable[str | Path] | None,
 ) -> List[Tuple[str, Path]]:
     """
     Resolve source directories relative to project root and drop missing entries.
     """
+    project_root_str = os.fspath(project_root)
     resolved: List[Tuple[str, Path]] = []
-    for raw in sources or []:
-        source = raw if raw.is_absolute() else project_root / raw
+    for raw in sources or ():
+        raw_str = os.fspath(raw)
+        source = raw_str if os.path.isabs(raw_str) else os.path.join(project_root_str, raw_str)
         try:
-            source_resolved = source.resolve()
+            source_resolved = os.path.realpath(source)
         except OSError:
             source_resolved = source
-        if not source_resolved.exists() or not source_resolved.is_dir():
+        # One stat answers both "exists" and "is a directory".
+        try:
+            if not stat.S_ISDIR(os.stat(source_resolved).st_mode):
+                continue
+        except OSError:
             continue
-        label = source_resolved.name or str(source_resolved).replace(os.sep, "_")
-        resolved.append((label, source_resolved))
+        # Only surviving entries are wrapped in Path.
+        label = os.path.basename(source_resolved) or source_resolved.replace(os.sep, "_")
+        resolved.append((label, Path(source_resolved)))
     return resolved
 
 
+def _iter_env_entries(env_value: str) -> Iterator[str]:
+    for entry in env_value.split(os.pathsep):
+        stripped = entry.strip()
+        if stripped:
+            yield stripped
+
+
 def parse_source_env(project_root: Path, env_value: str | None) -> List[Tuple[str, Path]]:
     """
     Parse GC_PROMPT_SOURCE_DIRS, returning resolved source directories.
     """
-    if env_value:
-        entries = [entry.strip() for entry in env_value.split(os.pathsep) if entry.strip()]
-        candidates = [Path(entry) for entry in entries]
-    else:
-        candidates = list(DEFAULT_SOURCE_DIRECTORIES)
+    candidates = _iter_env_entries(env_value) if env_value else DEFAULT_SOURCE_DIRECTORIES
     return _normalise_source_roots(project_root, candidates)
 
 
@@ -86,6 +315,11 @@ def ensure_prompt_registry(
         source_dirs: sequence of (label, path) tuples to pull markdown files from.
         clean: when True, the registry directory is wiped before rebuilding.
 
+    Sources whose directory mtimes match the previous build's manifest are not
+    rescanned, and the call returns early when none changed and every recorded
+    link is still in place (missing links are recreated). Set
+    GC_PROMPT_REGISTRY_FORCE=1 to ignore the manifest and relink everything.
+
     Returns:
         Path to the registry directory.
     """
@@ -101,26 +335,69 @@ def ensure_prompt_registry(
 
     registry.mkdir(parents=True, exist_ok=True)
 
-    sources = list(source_dirs or _normalise_source_roots(project_root, DEFAULT_SOURCE_DIRECTORIES))
+    sources = list(source_dirs or parse_source_env(project_root, None))
     if not sources:
         return registry
 
-    seen: set[Path] = set()
-    for label, source_root in sources:
-        for path in source_root.rglob("*.md"):
-            if not path.is_file():
-                continue
-            try:
-                path_resolved = path.resolve()
-            except OSError:
-                path_resolved = path
-            if path_resolved in seen:
-                continue
-            seen.add(path_resolved)
-            rel = path_resolved.relative_to(source_root)
-            destination = registry / label / rel
-            _relative_symlink(path_resolved, destination)
+    registry_str = os.fspath(registry)
+    manifest_path = registry / REGISTRY_MANIFEST_NAME
+    force = os.environ.get("GC_PROMPT_REGISTRY_FORCE", "").strip().lower() not in {"", "0", "false"}
+    previous, manifest_written_ns = ({}, 0) if clean else _load_manifest(manifest_path)
+
+    records: List[Optional[Dict[str, Any]]] = []
+    pending: List[int] = []
+    for index, (label, source_root) in enumerate(sources):
+        record = None if force else previous.get(os.fspath(source_root))
+        if (
+            isinstance(record, dict)
+            and record.get("label") == label
+            and _dirs_unchanged(record.get("dirs") or {}, manifest_written_ns)
+        ):
+            records.append(record)
+        else:
+            records.append(None)
+            pending.append(index)
+
+    existing_links = _dedupe_links(previous.values())
+    missing = set() if force else _missing_links(registry_str, existing_links)
+    if not pending and not missing and len(previous) == len(sources):
+        return registry
+
+    if not pending:
+        indexed = []
+    elif len(pending) == 1:
+        indexed = [_index_source(sources[pending[0]][1], registry_str)]
+    else:
+        # Source walks are independent and I/O bound; overlap them, then
+        # deduplicate on this thread in source order so precedence is unchanged.
+        with ThreadPoolExecutor(max_workers=min(8, len(pending))) as executor:
+            indexed = list(executor.map(lambda index: _index_source(sources[index][1], registry_str), pending))
+    for index, record in zip(pending, indexed):
+        record["label"] = sources[index][0]
+        records[index] = record
+
+    # File order within a source is unspecified; dedup is by realpath identity
+    # and only the order of ``sources`` decides which label wins.
+    existing = set(existing_links)
+    wanted = _dedupe_links(records)
+    for _key, label, rel in existing.difference(wanted):
+        try:
+            os.unlink(os.path.join(registry_str, label, rel))
+        except FileNotFoundError:
+            pass
+    label_dirs = {label: os.path.join(registry_str, label) for label, _source_root in sources}
+    links = [
+        (key, os.path.join(label_dirs[label], rel))
+        for key, label, rel in wanted
+        if force or (key, label, rel) not in existing or (key, label, rel) in missing
+    ]
+    all_linked = _batch_symlink(links)
 
+    _write_manifest(
+        manifest_path,
+        {os.fspath(source_root): record for (_label, source_root), record in zip(sources, records)},
+        all_linked,
+    )
     return registry
 
 
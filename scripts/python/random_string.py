@@ -1,16 +1,35 @@
 #!/usr/bin/env python3
 """Generate a pseudo-random alphanumeric string for shell helpers."""
 
+import os
 import secrets
 import string
 
+TOKEN_LENGTH = 32
+ALPHABET = (string.ascii_letters + string.digits).encode("ascii")
+# Map each byte onto the 62-character alphabet; bytes >= 248 are dropped so
+# every character stays equally likely (248 = 4 * 62).
+_CUTOFF = len(ALPHABET) * (256 // len(ALPHABET))
+_BYTE_TABLE = bytes(ALPHABET[value % len(ALPHABET)] for value in range(256))
+_REJECTED = bytes(range(_CUTOFF, 256))
+
+
+def _random_bytes(count: int) -> bytes:
+    getrandom = getattr(os, "getrandom", None)
+    if getrandom is not None:
+        try:
+            return getrandom(count, os.GRND_NONBLOCK)
+        except (BlockingIOError, OSError):
+            pass
+    return secrets.token_bytes(count)
+
 
 def main() -> None:
-    alphabet = string.ascii_letters + string.digits
-    token = "".join(secrets.choice(alphabet) for _ in range(32))
-    print(token)
+    token = b""
+    while len(token) < TOKEN_LENGTH:
+        token += _random_bytes(TOKEN_LENGTH + 16).translate(_BYTE_TABLE, _REJECTED)
+    print(token[:TOKEN_LENGTH].decode("ascii"))
 
 
 if __name__ == "__main__":
     main()
-
@@ -1,16 +1,25 @@
-import base64
 import hashlib
+import heapq
 import json
+import mmap
 import os
 import pathlib
 import re
 import shlex
+import stat
 import subprocess
 import sys
 import tempfile
 import textwrap
+from binascii import b2a_base64
+from functools import lru_cache
 from typing import Iterable, List, Optional
 
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None  # type: ignore[assignment]
+
 
 def run_self_test() -> int:
     with tempfile.TemporaryDirectory() as tmpdir:
@@ -98,47 +107,123 @@ step_arg = sys.argv[12] if len(sys.argv) > 12 else ""
 max_out_arg = sys.argv[13] if len(sys.argv) > 13 else ""
 duration_arg = sys.argv[14] if len(sys.argv) > 14 else ""
 
-if log_path.exists():
-    raw_text = log_path.read_text(encoding="utf-8", errors="ignore")
-else:
-    raw_text = ""
-
 fields = {}
+NUMBER_STRIP_TABLE = str.maketrans("", "", ",_ ")
+NUMBER_MULTIPLIERS = {
+    "k": 1_000,
+    "m": 1_000_000,
+    "b": 1_000_000_000,
+    "g": 1_000_000_000,
+    "t": 1_000_000_000_000,
+}
+
 def parse_number(text: str) -> int:
     cleaned = (text or "").strip()
     if not cleaned:
         raise ValueError("empty")
     cleaned = cleaned.strip("[]{}()")
     cleaned = cleaned.lstrip("≈~<>≤≥=")
-    cleaned = cleaned.replace(",", "").replace("_", "").replace(" ", "")
+    cleaned = cleaned.translate(NUMBER_STRIP_TABLE)
     if not cleaned:
         raise ValueError("empty")
-    suffix = ""
-    if cleaned and cleaned[-1].lower() in ("k", "m", "b", "g", "t"):
-        suffix = cleaned[-1].lower()
+    factor = NUMBER_MULTIPLIERS.get(cleaned[-1].lower(), 1)
+    if factor != 1:
         cleaned = cleaned[:-1]
     if not cleaned:
         raise ValueError("empty")
-    number_match = re.match(r"^[-+]?(?:\d+|\d*\.\d+)$", cleaned)
-    if not number_match:
+    # Same shape as ^[-+]?(?:\d+|\d*\.\d+)$ without a regex: optional sign,
+    # decimal digits with at most one inner/leading dot, never a trailing one.
+    digits = cleaned[1:] if cleaned[0] in "+-" else cleaned
+    if not digits or digits[-1] == "." or not digits.replace(".", "", 1).isdecimal():
         raise ValueError("unparsable")
-    value = float(cleaned)
-    multipliers = {
-        "": 1,
-        "k": 1_000,
-        "m": 1_000_000,
-        "b": 1_000_000_000,
-        "g": 1_000_000_000,
-        "t": 1_000_000_000_000,
-    }
-    factor = multipliers.get(suffix, 1)
-    return int(round(value * factor))
-
-def capture(field: str, value: str) -> None:
+    return int(round(float(cleaned) * factor))
+
+# Cloning a preconfigured hasher skips the constructor's keyword parsing,
+# which dominates for the short digest sources hashed here.
+SHORT_DIGEST_BASE = hashlib.blake2b(digest_size=6)
+
+def short_digest(text) -> str:
+    # 12 hex chars, as before, from a 6-byte BLAKE2b rather than truncated SHA-256.
+    hasher = SHORT_DIGEST_BASE.copy()
+    hasher.update(text if isinstance(text, bytes) else text.encode("utf-8", "ignore"))
+    return hasher.hexdigest()
+
+# Below this size a plain read is cheaper than setting up a mapping.
+CACHE_MMAP_THRESHOLD = 16 * 1024
+
+def load_json_cache(path: pathlib.Path) -> dict:
+    try:
+        with open(path, "rb") as handle:
+            size = os.fstat(handle.fileno()).st_size
+            if orjson is not None and size >= CACHE_MMAP_THRESHOLD:
+                # orjson parses straight out of the mapped pages.
+                with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)
+                    try:
+                        data = orjson.loads(view)
+                    finally:
+                        view.release()
+            else:
+                raw = handle.read()
+                if not raw.strip():
+                    return {}
+                data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    except Exception:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    # Every cache maps digest -> entry dict; dropping anything else here lets
+    # the per-entry loops use plain .get() lookups.
+    return {key: value for key, value in data.items() if isinstance(value, dict)}
+
+def dump_json(data, indent: bool = False, sort_keys: bool = False) -> bytes:
+    if orjson is not None:
+        option = (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(data, option=option)
+        except TypeError:
+            # orjson refuses integers wider than 64 bits; json does not.
+            pass
+    if indent:
+        text = json.dumps(data, indent=2, sort_keys=sort_keys)
+    else:
+        text = json.dumps(data, sort_keys=sort_keys, separators=(",", ":"))
+    return text.encode("utf-8")
+
+def trim_cache(data: dict, limit: int) -> dict:
+    # Keep the most recently seen entries; nlargest avoids sorting the lot.
+    if len(data) <= limit:
+        return data
+    return dict(heapq.nlargest(limit, data.items(), key=lambda item: item[1].get("last_seen", "")))
+
+cache_parent_dirs: set = set()
+
+def write_json_cache(path: pathlib.Path, data: dict) -> None:
+    # Write to a per-process temp file and rename over the cache, so readers
+    # never see a half-written file; each parent directory is created once.
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        if path.parent not in cache_parent_dirs:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            cache_parent_dirs.add(path.parent)
+        tmp_path.write_bytes(dump_json(data, indent=True))
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+
+def b64_field(text: str) -> str:
+    # CMD* lines carry free text base64-encoded (gc_decode_base64 on the shell
+    # side); empty text stays empty. b2a_base64 is what b64encode wraps.
+    return b2a_base64(text.encode("utf-8"), newline=False).decode("ascii") if text else ""
+
+def capture(target: dict, field: str, value: str) -> None:
     if not value:
         return
     try:
-        fields[field] = parse_number(value)
+        target[field] = parse_number(value)
     except Exception:
         pass
 
@@ -158,12 +243,89 @@ line_patterns = [
     ("cached_tokens", re.compile(r'\bcached\s*=\s*' + number_pattern, re.IGNORECASE)),
 ]
 
-for line in raw_text.splitlines():
-    if not line:
+limit_needles = [
+    "usage limit",
+    "usage-limit",
+    "usage cap",
+    "usage-cap",
+    "quota exceeded",
+    "quota has been reached",
+    "exceeded your current quota",
+    "exceeded your quota",
+    "quota reached",
+    "credit balance is too low",
+    "billing hard limit",
+    "hard usage limit",
+    "usage credits exhausted",
+]
+# Matched against the already-lowercased line; re.IGNORECASE on the raw line
+# was measured roughly 10x slower under sre.
+limit_pattern = re.compile("|".join(re.escape(needle) for needle in limit_needles))
+
+limit_bytes_pattern = re.compile(limit_pattern.pattern.encode("ascii"))
+# Every needle contains its first word, so a block holding none of these
+# words cannot match; plain substring tests are far cheaper than the regex.
+limit_anchors = tuple({re.split(r"[ -]", needle, 1)[0].encode("ascii") for needle in limit_needles})
+
+
+# Summary clean-up patterns for the per-failure loop.
+trailing_space_newline_pattern = re.compile(r"\s+\n")
+leading_space_newline_pattern = re.compile(r"\n\s+")
+whitespace_run_pattern = re.compile(r"\s+")
+
+
+def decode_log_line(raw_line: bytes) -> List[str]:
+    return raw_line.decode("utf-8", "ignore").splitlines()
+
+
+def find_limit_message(block_lines: List[bytes]) -> Optional[str]:
+    # Needles never span a newline, so one search over the joined block rules
+    # out every line in it at once; only a hit (or non-ASCII text, where
+    # bytes.lower() and str.lower() can differ) needs the per-line check.
+    block = b"".join(block_lines)
+    if block.isascii():
+        lowered = block.lower()
+        if not any(anchor in lowered for anchor in limit_anchors) or not limit_bytes_pattern.search(lowered):
+            return None
+    for raw_line in block_lines:
+        for line in decode_log_line(raw_line):
+            if line and limit_pattern.search(line.lower()):
+                return line.strip()
+    return None
+
+
+# Single streaming pass over the log in ~1 MiB blocks of whole lines: the
+# first usage-limit line is picked up as blocks are read. Lines stay undecoded
+# bytes and are only decoded where a scanner needs them.
+limit_message = None
+raw_lines: List[bytes] = []
+if log_path.exists():
+    with log_path.open("rb", buffering=1 << 20) as log_handle:
+        for block_lines in iter(lambda: log_handle.readlines(1 << 20), []):
+            raw_lines.extend(block_lines)
+            if limit_message is None:
+                limit_message = find_limit_message(block_lines)
+
+# The last capture of each field wins, so scan from the end of the log (where
+# the usage summary normally sits) and stop once every field is settled.
+token_field_count = len({field for field, _ in line_patterns})
+for raw_line in reversed(raw_lines):
+    if len(fields) == token_field_count:
+        break
+    # Every pattern needs either "token" or "=" (the key=value forms), so most
+    # log lines are rejected with two substring tests instead of 12 searches.
+    if raw_line.isascii() and b"=" not in raw_line and b"token" not in raw_line.lower():
         continue
-    for field, pattern in line_patterns:
-        for match in pattern.finditer(line):
-            capture(field, match.group(1))
+    for line in reversed(decode_log_line(raw_line)):
+        if not line or ("=" not in line and "token" not in line.lower()):
+            continue
+        line_fields = {}
+        for field, pattern in line_patterns:
+            if field in fields:
+                continue
+            for match in pattern.finditer(line):
+                capture(line_fields, field, match.group(1))
+        fields.update(line_fields)
 
 if "total_tokens" not in fields:
     prompt_val = fields.get("prompt_tokens")
@@ -207,31 +369,6 @@ if duration_arg:
     except ValueError:
         pass
 
-limit_needles = [
-    "usage limit",
-    "usage-limit",
-    "usage cap",
-    "usage-cap",
-    "quota exceeded",
-    "quota has been reached",
-    "exceeded your current quota",
-    "exceeded your quota",
-    "quota reached",
-    "credit balance is too low",
-    "billing hard limit",
-    "hard usage limit",
-    "usage credits exhausted",
-]
-
-limit_message = None
-if raw_text:
-    for line in raw_text.splitlines():
-        lower = line.lower()
-        if not lower.strip():
-            continue
-        if any(needle in lower for needle in limit_needles):
-            limit_message = line.strip()
-            break
 
 if limit_message:
     record["limit_detected"] = True
@@ -248,22 +385,18 @@ failure_remediation_notes = {}
 command_sequence: List[dict] = []
 failures = {}
 
+# The failure/stream/file/scan caches are plain JSON objects keyed by digest:
+# work_on_tasks_runtime.py and document_index.py read the same files straight
+# from GC_COMMAND_*_CACHE, so their format is shared, not private to this script.
 cached_failure_cache = {}
 cached_failure_counts = {}
 cached_failure_details = {}
+pnpm_install_failure = None
 if cmd_cache_path:
-    try:
-        cache_raw = cmd_cache_path.read_text(encoding="utf-8")
-        cached_failure_cache = json.loads(cache_raw) if cache_raw.strip() else {}
-        if not isinstance(cached_failure_cache, dict):
-            cached_failure_cache = {}
-    except Exception:
-        cached_failure_cache = {}
+    cached_failure_cache = load_json_cache(cmd_cache_path)
 
 if cached_failure_cache:
     for value in cached_failure_cache.values():
-        if not isinstance(value, dict):
-            continue
         command_text = value.get("command")
         if not isinstance(command_text, str):
             continue
@@ -275,9 +408,9 @@ if cached_failure_cache:
             count = 0
         cached_failure_counts[command_text] = count
         cached_failure_details.setdefault(command_text, value)
-if raw_text:
-    lines_list = raw_text.splitlines()
-    total_lines = len(lines_list)
+        if pnpm_install_failure is None and command_text.strip().startswith("pnpm install"):
+            pnpm_install_failure = value
+if raw_lines:
     exec_pattern = re.compile(
         r"exec\s+[^\s]+\s+-lc\s+(?:'(?P<sqcmd>[^']*)'|\"(?P<dqcmd>[^\"]*)\"|(?P<plain>\S+))(?:\s+in\s+(?P<cwd>\S+))?"
     )
@@ -286,12 +419,41 @@ if raw_text:
     )
     timestamp_pattern = re.compile(r"^\[\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\]")
     line_timestamp_pattern = re.compile(r"^\[(?P<ts>[^]]+)\]")
+    exit_code_pattern = re.compile(r"(-?\d+)")
     project_root_hint = os.getenv("PROJECT_ROOT", "")
     try:
         project_root_path = pathlib.Path(project_root_hint).resolve() if project_root_hint else None
     except (OSError, RuntimeError, ValueError):
         project_root_path = None
 
+# First match wins. Needles are tested against the lowercased command with a
+# leading space, so " go test" also matches a command that starts with it.
+REMEDIATION_RULES = (
+    (("pnpm", "build"), "Review the pnpm build errors and update the source code or configuration."),
+    (("pnpm", "test"), "Fix the failing tests or prerequisites before running this test command again."),
+    (("pnpm", "install"), "Resolve the installation issue (dependency or network) before retrying `pnpm install`."),
+    (("pnpm",), "Resolve the pnpm command failure before rerunning."),
+    (("npm", "run"), "Fix the npm script failure before rerunning the command."),
+    ((" go test",), "Correct the Go test failure before re-running `go test`."),
+    (("pytest",), "Fix the pytest errors before rerunning the tests."),
+    (("make ",), "Address the make target failure before rerunning."),
+)
+
+def remediation_message(command_text, failure_count=1, exit_code=None):
+    lower = " " + (command_text or "").strip().lower()
+    base = "Investigate the failure output above and fix the root cause."
+    for needles, message in REMEDIATION_RULES:
+        if all(needle in lower for needle in needles):
+            base = message
+            break
+    if failure_count and failure_count > 1:
+        suffix = f" It has already failed {failure_count} time(s); do not rerun until the fix is applied and documented."
+    else:
+        suffix = " Do not rerun until the fix is applied and documented."
+    return base + suffix
+
+# Command entries repeat a handful of cwds; the result is an immutable Path.
+@lru_cache(maxsize=1024)
 def resolve_workdir(cwd: str, project_root_path: Optional[pathlib.Path]) -> pathlib.Path:
     if cwd:
         candidate = pathlib.Path(cwd)
@@ -308,41 +470,53 @@ def iter_command_entries(sequence: Optional[List[dict]]) -> Iterable[dict]:
         if isinstance(item, dict):
             yield item
 
+# Folding the other shell stop characters onto "|" lets one split cut the
+# candidate at whichever of | > < ; comes first.
+path_stop_table = str.maketrans("><;", "|||")
+SHELL_QUOTE_CHARS = ("'", '"', "\\")
+PNPM_VALUE_FLAGS = frozenset({"-C", "--dir", "--filter", "-F"})
+file_stat_cache: dict = {}
+
+# Repeated sed/cat reads of one file share a single resolve + stat.
+@lru_cache(maxsize=None)
 def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
     candidate = (raw or "").strip()
     if not candidate:
         return None
-    candidate = candidate.split("|", 1)[0]
-    candidate = candidate.split(">", 1)[0]
-    candidate = candidate.split("<", 1)[0]
-    candidate = candidate.split(";", 1)[0]
-    candidate = candidate.strip()
+    candidate = candidate.translate(path_stop_table).split("|", 1)[0].strip()
     if candidate.startswith(("'", '"')) and candidate.endswith(candidate[0]) and len(candidate) >= 2:
         candidate = candidate[1:-1].strip()
     if not candidate:
         return None
     candidate = os.path.expanduser(candidate)
-    if os.path.isabs(candidate):
-        path_obj = pathlib.Path(candidate)
-    else:
-        base = pathlib.Path(cwd) if cwd else project_root_path
+    if not os.path.isabs(candidate):
+        base = cwd or (os.fspath(project_root_path) if project_root_path else "")
         if base:
-            path_obj = base / candidate
-        else:
-            path_obj = pathlib.Path(candidate)
+            candidate = os.path.join(base, candidate)
     try:
-        resolved = path_obj.resolve(strict=False)
+        resolved = os.path.realpath(candidate)
     except (OSError, RuntimeError):
-        resolved = path_obj
-    if not resolved.exists() or not resolved.is_file():
+        resolved = candidate
+    # One stat answers both "exists" and "is a regular file", and is reused
+    # by build_file_info.
+    try:
+        file_stat = os.stat(resolved)
+    except (OSError, ValueError):
+        return None
+    if not stat.S_ISREG(file_stat.st_mode):
         return None
-    return resolved
+    file_stat_cache[resolved] = file_stat
+    return pathlib.Path(resolved)
 
     def build_file_info(path_obj: pathlib.Path, start: Optional[int], end: Optional[int], mode: str) -> Optional[dict]:
-        try:
-            stat = path_obj.stat()
-        except OSError:
-            return None
+        cache_key = str(path_obj)
+        stat = file_stat_cache.get(cache_key)
+        if stat is None:
+            try:
+                stat = path_obj.stat()
+            except OSError:
+                return None
+            file_stat_cache[cache_key] = stat
         mtime_ns = getattr(stat, "st_mtime_ns", None)
         if mtime_ns is None:
             mtime_ns = int(stat.st_mtime * 1_000_000_000)
@@ -396,40 +570,44 @@ def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
             "summary": summary,
         }
 
-    sed_chunk_pattern = re.compile(
-        r"^sed\s+-n\s+['\"]?(?P<start>\d+)\s*,\s*(?P<end>\d+)[pP]['\"]?\s+(?P<path>[^|;]+)"
+    file_read_pattern = re.compile(
+        r"^(?:sed\s+-n\s+['\"]?(?P<sed_start>\d+)\s*,\s*(?P<sed_end>\d+)[pP]['\"]?\s+(?P<sed_path>[^|;]+)"
+        r"|cat\s+(?P<cat_path>[^>|;&]+)$)"
     )
-    cat_pattern = re.compile(r"^cat\s+(?P<path>[^>|;&]+)$")
 
     def parse_file_read(command: str, cwd: str) -> Optional[dict]:
         command = (command or "").strip()
         if not command:
             return None
-        sed_match = sed_chunk_pattern.match(command)
-        if sed_match:
-            path_obj = normalise_candidate_path(sed_match.group("path"), cwd)
+        read_match = file_read_pattern.match(command)
+        if not read_match:
+            return None
+        if read_match.group("sed_path") is not None:
+            path_obj = normalise_candidate_path(read_match.group("sed_path"), cwd)
             if not path_obj:
                 return None
             try:
-                start_val = int(sed_match.group("start"))
-                end_val = int(sed_match.group("end"))
+                start_val = int(read_match.group("sed_start"))
+                end_val = int(read_match.group("sed_end"))
             except (TypeError, ValueError):
                 return None
             return build_file_info(path_obj, start_val, end_val, "sed")
-        cat_match = cat_pattern.match(command)
-        if cat_match:
-            path_obj = normalise_candidate_path(cat_match.group("path"), cwd)
-            if not path_obj:
-                return None
-            return build_file_info(path_obj, None, None, "cat")
-        return None
+        path_obj = normalise_candidate_path(read_match.group("cat_path"), cwd)
+        if not path_obj:
+            return None
+        return build_file_info(path_obj, None, None, "cat")
 
     failures = {}
     command_sequence = []
+    # The exec/result parser looks ahead across command output, so it works
+    # on the fully decoded line list.
+    lines_list = [line for raw_line in raw_lines for line in decode_log_line(raw_line)]
+    total_lines = len(lines_list)
     i = 0
     while i < total_lines:
         line = lines_list[i]
-        exec_match = exec_pattern.search(line)
+        # exec_pattern needs a literal "exec"; most lines are command output.
+        exec_match = exec_pattern.search(line) if "exec" in line else None
         if exec_match:
             raw_cmd = (
                 exec_match.group("sqcmd")
@@ -452,13 +630,17 @@ def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
             j = i + 1
             while j < total_lines:
                 result_line = lines_list[j]
+                # Result and timestamp lines both start with "[".
+                if result_line[:1] != "[":
+                    j += 1
+                    continue
                 result_match = result_pattern.match(result_line)
                 if result_match:
                     outcome = result_match.group("outcome")
                     exit_value = 0
                     if outcome == "exited":
                         rest_text = result_match.group("rest") or ""
-                        code_match = re.search(r"(-?\d+)", rest_text)
+                        code_match = exit_code_pattern.search(rest_text)
                         if code_match:
                             try:
                                 exit_value = int(code_match.group(1))
@@ -468,13 +650,14 @@ def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
                             exit_value = 1
                     output_lines = []
                     k = j + 1
-                    while k < total_lines and not timestamp_pattern.match(lines_list[k]):
+                    while k < total_lines and not (lines_list[k][:1] == "[" and timestamp_pattern.match(lines_list[k])):
                         output_lines.append(lines_list[k])
                         k += 1
                     summary_text = "\n".join(output_lines).strip()
                     stored_lines = output_lines[:80]
                     truncated_flag = len(output_lines) > len(stored_lines)
-                    preview_text = "\n".join(stored_lines).strip()
+                    # Short outputs are stored whole, so the summary join can be reused.
+                    preview_text = "\n".join(stored_lines).strip() if truncated_flag else summary_text
                     if len(preview_text) > 2000:
                         preview_text = preview_text[:1997] + "..."
                         truncated_flag = True
@@ -492,7 +675,7 @@ def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
                         if len(trimmed_summary) > 1800:
                             trimmed_summary = trimmed_summary[:1797] + "..."
                         digest_source = f"{project_root_hint}\n{command_text}\n{exit_value}\n{trimmed_summary}"
-                        digest = hashlib.sha256(digest_source.encode("utf-8", "ignore")).hexdigest()[:12]
+                        digest = short_digest(digest_source)
                         entry = failures.get(digest)
                         if entry:
                             entry["count"] += 1
@@ -514,20 +697,16 @@ def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
                     j += 1
         i += 1
 
-    sed_chunk_pattern = re.compile(
-        r"^sed\s+-n\s+['\"]?(?P<start>\d+)\s*,\s*(?P<end>\d+)[pP]['\"]?\s+(?P<path>[^|;]+)"
-    )
-
     def parse_sed_chunk(command: str):
-        match = sed_chunk_pattern.match(command)
-        if not match:
+        match = file_read_pattern.match(command)
+        if not match or match.group("sed_path") is None:
             return None
         try:
-            start = int(match.group("start"))
-            end = int(match.group("end"))
+            start = int(match.group("sed_start"))
+            end = int(match.group("sed_end"))
         except Exception:
             return None
-        path = match.group("path").strip()
+        path = match.group("sed_path").strip()
         path = path.split("|", 1)[0].strip()
         path = path.split(";", 1)[0].strip()
         if path.startswith(("'", '"')) and path.endswith(path[0]) and len(path) >= 2:
@@ -538,6 +717,7 @@ def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
 
     build_artifact_dirs = {"dist", "dist-tests", "build", "coverage", "out", "tmp", ".next", "node_modules", "public-build"}
 
+    @lru_cache(maxsize=1024)
     def is_build_artifact_path(rel_path: str) -> bool:
         if not rel_path:
             return False
@@ -564,6 +744,26 @@ def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
     current_seq = None
     gap_threshold = 40
     sequence_iterable = command_sequence if isinstance(command_sequence, list) else []
+
+    @lru_cache(maxsize=None)
+    def node_modules_present(base: pathlib.Path) -> bool:
+        # Many pnpm commands share a workdir; stat each candidate only once.
+        node_modules = os.path.join(os.fspath(base), "node_modules")
+        return os.path.exists(node_modules) or os.path.exists(os.path.join(node_modules, ".pnpm"))
+
+    # The cached `pnpm install` failure is the same for every pnpm test/build
+    # command, so its guard message is built once here.
+    pnpm_install_issue = ""
+    if pnpm_install_failure is not None:
+        try:
+            install_fail_count = int(pnpm_install_failure.get("count") or 0)
+        except Exception:
+            install_fail_count = 0
+        if install_fail_count > 0:
+            install_summary = (pnpm_install_failure.get("last_summary") or pnpm_install_failure.get("summary") or "").strip()
+            pnpm_install_issue = (
+                f"`pnpm install` previously failed {install_fail_count} time(s){': ' + install_summary if install_summary else ''}"
+            )
     try:
         for entry in sequence_iterable:
             if not isinstance(entry, dict):
@@ -576,9 +776,13 @@ def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
                     workdir_path = project_root_path or pathlib.Path.cwd()
                 pnpm_issues = []
                 if command_text:
-                    try:
-                        parts = shlex.split(command_text)
-                    except ValueError:
+                    if any(char in command_text for char in SHELL_QUOTE_CHARS):
+                        try:
+                            parts = shlex.split(command_text)
+                        except ValueError:
+                            parts = command_text.split()
+                    else:
+                        # Without quotes or escapes shlex splits on plain whitespace.
                         parts = command_text.split()
                     if parts and parts[0] == "pnpm":
                         task_token = ""
@@ -590,7 +794,7 @@ def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
                                 skip_next = False
                                 idx += 1
                                 continue
-                            if token in {"-C", "--dir", "--filter", "-F"}:
+                            if token in PNPM_VALUE_FLAGS:
                                 skip_next = True
                                 idx += 1
                                 continue
@@ -604,16 +808,9 @@ def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
                             task_token = parts[idx]
                         pnpm_task = task_token
                         if pnpm_task in {"test", "build"}:
-                            modules_paths = [
-                                workdir_path / "node_modules",
-                                workdir_path / "node_modules" / ".pnpm",
-                            ]
-                            if project_root_path:
-                                modules_paths.extend([
-                                    project_root_path / "node_modules",
-                                    project_root_path / "node_modules" / ".pnpm",
-                                ])
-                            modules_present = any(path.exists() for path in modules_paths)
+                            modules_present = node_modules_present(workdir_path) or (
+                                project_root_path is not None and node_modules_present(project_root_path)
+                            )
                             if not modules_present:
                                 pnpm_issues.append("node_modules missing; run `pnpm install` before invoking pnpm test/build.")
                             failure_entry = cached_failure_details.get(command_text)
@@ -627,29 +824,22 @@ def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
                                     pnpm_issues.append(
                                         f"Command previously failed {prev_count} time(s){': ' + summary if summary else ''}"
                                     )
-                            for value in cached_failure_cache.values():
-                                if not isinstance(value, dict):
-                                    continue
-                                cmd_text = value.get("command")
-                                if isinstance(cmd_text, str) and cmd_text.strip().startswith("pnpm install"):
-                                    try:
-                                        install_fail_count = int(value.get("count") or 0)
-                                    except Exception:
-                                        install_fail_count = 0
-                                    if install_fail_count > 0:
-                                        install_summary = (value.get("last_summary") or value.get("summary") or "").strip()
-                                        pnpm_issues.append(
-                                            f"`pnpm install` previously failed {install_fail_count} time(s){': ' + install_summary if install_summary else ''}"
-                                        )
-                                    break
+                            if pnpm_install_issue:
+                                pnpm_issues.append(pnpm_install_issue)
                         if pnpm_issues:
-                            digest_source = f"{project_root_hint}\n{command_text}\n{entry.get('cwd') or ''}"
-                            guard_digest = hashlib.sha256(digest_source.encode('utf-8', 'ignore')).hexdigest()[:12]
-                            encoded_command = base64.b64encode(command_text.encode('utf-8')).decode('ascii') if command_text else ""
-                            guard_message = ' '.join(pnpm_issues)
-                            encoded_message = base64.b64encode(guard_message.encode('utf-8')).decode('ascii') if guard_message else ""
+                            command_bytes = command_text.encode('utf-8')
+                            guard_digest = short_digest(
+                                b"%s\n%s\n%s"
+                                % (
+                                    project_root_hint.encode('utf-8', 'ignore'),
+                                    command_bytes,
+                                    (entry.get('cwd') or '').encode('utf-8', 'ignore'),
+                                )
+                            )
+                            encoded_command = b2a_base64(command_bytes, newline=False).decode('ascii')
+                            encoded_message = b64_field(' '.join(pnpm_issues))
                             command_guard_lines.append(
-                                f"CMDGUARD\t{guard_digest}\t0\t{len(pnpm_issues)}\t{encoded_command}\t{encoded_message}"
+                                "\t".join(("CMDGUARD", guard_digest, "0", str(len(pnpm_issues)), encoded_command, encoded_message))
                             )
                             guard_entries.append({
                                 "command": command_text,
@@ -701,14 +891,15 @@ def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
         finalize_sequence(current_seq, stream_sequences)
 
     file_cache_data = {}
+    # Every stored entry bumps count/last_seen, so "touched" means "changed";
+    # an untouched cache is left as it is on disk unless it is over its trim
+    # limit, which every run still enforces.
+    file_cache_dirty = False
     if file_cache_path:
-        try:
-            contents = file_cache_path.read_text(encoding="utf-8")
-            file_cache_data = json.loads(contents) if contents.strip() else {}
-            if not isinstance(file_cache_data, dict):
-                file_cache_data = {}
-        except Exception:
-            file_cache_data = {}
+        file_cache_data = load_json_cache(file_cache_path)
+        file_cache_dirty = len(file_cache_data) > 120
+    project_root_prefix = os.path.join(os.fspath(project_root_path), "") if project_root_path else ""
+    build_artifact_cache: dict = {}
 
     for entry in iter_command_entries(command_sequence):
         try:
@@ -722,13 +913,13 @@ def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
                 str(parsed_read.get("mtime_ns") or 0),
             ]
             digest_source = "::".join(digest_source_parts)
-            digest = hashlib.sha256(digest_source.encode("utf-8", "ignore")).hexdigest()[:12]
+            digest = short_digest(digest_source)
             existing_entry = None
             if file_cache_data:
                 existing_entry = file_cache_data.get(digest)
             prev_count = 0
             repeat_flag = False
-            if isinstance(existing_entry, dict):
+            if existing_entry is not None:
                 try:
                     prev_count = int(existing_entry.get("count") or 0)
                 except Exception:
@@ -751,52 +942,65 @@ def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
             record_entry["last_task"] = task
             rel_hint = record_entry.get("rel_path") or parsed_read.get("rel_path") or ""
             abs_hint = record_entry.get("path") or parsed_read.get("path") or ""
-            build_artifact = False
-            if rel_hint and is_build_artifact_path(rel_hint):
-                build_artifact = True
-            elif abs_hint:
-                try:
-                    abs_path_obj = pathlib.Path(abs_hint)
-                    if project_root_path:
-                        try:
-                            rel_from_root = abs_path_obj.resolve().relative_to(project_root_path)
-                            if is_build_artifact_path(str(rel_from_root)):
-                                build_artifact = True
-                        except Exception:
-                            if is_build_artifact_path(str(abs_path_obj)):
-                                build_artifact = True
+            build_artifact_key = (rel_hint, abs_hint)
+            build_artifact = build_artifact_cache.get(build_artifact_key)
+            if build_artifact is None:
+                build_artifact = False
+                if rel_hint and is_build_artifact_path(rel_hint):
+                    build_artifact = True
+                elif abs_hint:
+                    # The path came out of normalise_candidate_path already
+                    # realpath'd, so a string prefix test replaces resolve().
+                    abs_norm = os.path.normpath(abs_hint)
+                    if project_root_prefix and abs_norm.startswith(project_root_prefix):
+                        build_artifact = is_build_artifact_path(abs_norm[len(project_root_prefix):])
                     else:
-                        if is_build_artifact_path(str(abs_path_obj)):
-                            build_artifact = True
-                except Exception:
-                    build_artifact = False
+                        build_artifact = is_build_artifact_path(abs_norm)
+                build_artifact_cache[build_artifact_key] = build_artifact
             if build_artifact:
                 record_entry["category"] = "build-artifact"
                 parsed_read["category"] = "build-artifact"
                 parsed_read["excerpt"] = ""
                 record_entry["excerpt"] = ""
             file_cache_data[digest] = record_entry
+            file_cache_dirty = True
             summary_text = parsed_read.get("summary") or ""
             excerpt_text = parsed_read.get("excerpt") or ""
-            encoded_summary = base64.b64encode(summary_text.encode("utf-8")).decode("ascii")
-            encoded_excerpt = base64.b64encode(excerpt_text.encode("utf-8")).decode("ascii") if excerpt_text else ""
-            repeat_flag_int = 1 if repeat_flag else 0
             command_file_lines.append(
-                f"CMDFILE\t{digest}\t{repeat_flag_int}\t{new_count}\t{encoded_summary}\t{encoded_excerpt}"
+                "\t".join(
+                    ("CMDFILE", digest, "1" if repeat_flag else "0", str(new_count), b64_field(summary_text), b64_field(excerpt_text))
+                )
             )
         except Exception as file_entry_error:
             print(f"USAGE_LOG_WARNING\tfile_cache_entry_error\t{file_entry_error}", file=sys.stderr)
             continue
 
+    @lru_cache(maxsize=None)
+    def scan_cwd_display(cwd_raw: str) -> str:
+        # Depends only on the cwd (project_root_path is fixed for the run),
+        # and scan entries mostly share a few cwds.
+        cwd_display = cwd_raw
+        if project_root_path:
+            try:
+                resolved_cwd = resolve_workdir(cwd_raw, project_root_path)
+            except Exception:
+                resolved_cwd = None
+            if resolved_cwd:
+                try:
+                    rel_cwd = resolved_cwd.relative_to(project_root_path)
+                    cwd_display = "." if str(rel_cwd) in {"", "."} else str(rel_cwd)
+                except Exception:
+                    try:
+                        cwd_display = str(resolved_cwd)
+                    except Exception:
+                        cwd_display = cwd_raw
+        return cwd_display
+
     scan_cache_data = {}
+    scan_cache_dirty = False
     if scan_cache_path:
-        try:
-            contents = scan_cache_path.read_text(encoding="utf-8")
-            scan_cache_data = json.loads(contents) if contents.strip() else {}
-            if not isinstance(scan_cache_data, dict):
-                scan_cache_data = {}
-        except Exception:
-            scan_cache_data = {}
+        scan_cache_data = load_json_cache(scan_cache_path)
+        scan_cache_dirty = len(scan_cache_data) > 80
 
     for entry in iter_command_entries(command_sequence):
         try:
@@ -804,20 +1008,18 @@ def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
             if not classification:
                 continue
             digest_source = f"{project_root_hint}\n{entry.get('command') or ''}\n{entry.get('cwd') or ''}"
-            digest = hashlib.sha256(digest_source.encode("utf-8", "ignore")).hexdigest()[:12]
+            digest = short_digest(digest_source)
             prev_count = 0
             repeat_flag = False
             existing_entry = None
             if scan_cache_data:
                 existing_entry = scan_cache_data.get(digest)
-                if isinstance(existing_entry, dict):
+                if existing_entry is not None:
                     try:
                         prev_count = int(existing_entry.get("count") or 0)
                     except Exception:
                         prev_count = 0
                     repeat_flag = prev_count > 0
-                else:
-                    existing_entry = None
             new_count = prev_count + 1
             record_entry = existing_entry or {}
             if not record_entry.get("first_seen"):
@@ -827,22 +1029,7 @@ def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
             record_entry["command"] = command_text
             cwd_raw = entry.get("cwd") or ""
             record_entry["cwd"] = cwd_raw
-            cwd_display = cwd_raw
-            if project_root_path:
-                try:
-                    resolved_cwd = resolve_workdir(cwd_raw, project_root_path)
-                except Exception:
-                    resolved_cwd = None
-                if resolved_cwd:
-                    try:
-                        rel_cwd = resolved_cwd.relative_to(project_root_path)
-                        cwd_display = "." if str(rel_cwd) in {"", "."} else str(rel_cwd)
-                    except Exception:
-                        try:
-                            cwd_display = str(resolved_cwd)
-                        except Exception:
-                            cwd_display = cwd_raw
-            record_entry["cwd_display"] = cwd_display
+            record_entry["cwd_display"] = scan_cwd_display(cwd_raw)
             record_entry["count"] = new_count
             record_entry["message"] = classification
             output_lines = entry.get("output_lines") or []
@@ -853,13 +1040,13 @@ def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
             truncated_flag = bool(entry.get("output_truncated"))
             if output_lines:
                 max_preview_lines = 12
-                preview_lines = []
-                for raw_line in output_lines[:max_preview_lines]:
-                    preview_lines.append((raw_line or "").strip())
+                preview_lines = [(raw_line or "").strip() for raw_line in output_lines[:max_preview_lines]]
                 record_entry["lines"] = preview_lines
                 record_entry["line_count"] = line_count
                 record_entry["truncated"] = int(truncated_flag or len(output_lines) > max_preview_lines)
-                preview_text = (entry.get("output") or "\n".join(preview_lines)).strip()
+                # The exec parser stores "output" already stripped; only the
+                # joined fallback needs it.
+                preview_text = entry.get("output") or "\n".join(preview_lines).strip()
                 if len(preview_text) > 480:
                     preview_text = preview_text[:477] + "..."
                     record_entry["truncated"] = 1
@@ -874,66 +1061,32 @@ def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
                 if "preview" not in record_entry:
                     record_entry["preview"] = ""
             scan_cache_data[digest] = record_entry
-            encoded_command = base64.b64encode(command_text.encode("utf-8")).decode("ascii") if command_text else ""
-            encoded_message = base64.b64encode(classification.encode("utf-8")).decode("ascii")
-            repeat_flag_int = 1 if repeat_flag else 0
+            scan_cache_dirty = True
             command_scan_lines.append(
-                f"CMDSCAN\t{digest}\t{repeat_flag_int}\t{new_count}\t{encoded_command}\t{encoded_message}"
+                "\t".join(
+                    ("CMDSCAN", digest, "1" if repeat_flag else "0", str(new_count), b64_field(command_text), b64_field(classification))
+                )
             )
         except Exception as scan_entry_error:
             print(f"USAGE_LOG_WARNING\tcommand_scan_entry_error\t{scan_entry_error}", file=sys.stderr)
             continue
 
-    if scan_cache_path:
-        if len(scan_cache_data) > 80:
-            sorted_items = sorted(
-                scan_cache_data.items(),
-                key=lambda item: item[1].get("last_seen", ""),
-                reverse=True,
-            )
-            scan_cache_data = dict(sorted_items[:80])
-        try:
-            scan_cache_path.parent.mkdir(parents=True, exist_ok=True)
-            scan_cache_path.write_text(json.dumps(scan_cache_data, indent=2), encoding="utf-8")
-        except Exception:
-            pass
-
-    def remediation_message(command_text, failure_count=1, exit_code=None):
-        cmd = (command_text or "").strip()
-        lower = cmd.lower()
-        base = "Investigate the failure output above and fix the root cause."
-        if "pnpm" in lower and "build" in lower:
-            base = "Review the pnpm build errors and update the source code or configuration."
-        elif "pnpm" in lower and "test" in lower:
-            base = "Fix the failing tests or prerequisites before running this test command again."
-        elif "pnpm" in lower and "install" in lower:
-            base = "Resolve the installation issue (dependency or network) before retrying `pnpm install`."
-        elif "pnpm" in lower:
-            base = "Resolve the pnpm command failure before rerunning."
-        elif "npm" in lower and "run" in lower:
-            base = "Fix the npm script failure before rerunning the command." 
-        elif lower.startswith("go test") or " go test" in lower:
-            base = "Correct the Go test failure before re-running `go test`."
-        elif "pytest" in lower:
-            base = "Fix the pytest errors before rerunning the tests."
-        elif "make " in lower:
-            base = "Address the make target failure before rerunning."
-        if failure_count and failure_count > 1:
-            suffix = f" It has already failed {failure_count} time(s); do not rerun until the fix is applied and documented."
-        else:
-            suffix = " Do not rerun until the fix is applied and documented."
-        return base + suffix
+    if scan_cache_path and scan_cache_dirty:
+        scan_cache_data = trim_cache(scan_cache_data, 80)
+        write_json_cache(scan_cache_path, scan_cache_data)
 
     if failures:
-        cache_data = dict(cached_failure_cache)
+        # Nothing reads the loaded cache after this point (and the shallow
+        # copy shared its entry dicts anyway), so update it in place.
+        cache_data = cached_failure_cache
         for digest, entry in failures.items():
             summary_line = entry.get("summary") or ""
-            summary_line = re.sub(r'\s+\n', '\n', summary_line)
-            summary_line = re.sub(r'\n\s+', '\n', summary_line).strip()
+            summary_line = trailing_space_newline_pattern.sub('\n', summary_line)
+            summary_line = leading_space_newline_pattern.sub('\n', summary_line).strip()
             entry["summary"] = summary_line
             if cmd_cache_path:
                 existing = cache_data.get(digest)
-                if isinstance(existing, dict):
+                if existing is not None:
                     prev_count = int(existing.get("count", 0))
                     existing["count"] = prev_count + entry["count"]
                     existing["last_seen"] = timestamp
@@ -961,66 +1114,56 @@ def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
                 entry["total_failures"] = entry["count"]
 
         if cmd_cache_path:
-            if len(cache_data) > 50:
-                sorted_items = sorted(
-                    cache_data.items(),
-                    key=lambda item: item[1].get("last_seen", ""),
-                    reverse=True,
-                )
-                cache_data = dict(sorted_items[:50])
-            try:
-                cmd_cache_path.parent.mkdir(parents=True, exist_ok=True)
-                cmd_cache_path.write_text(json.dumps(cache_data, indent=2), encoding="utf-8")
-            except Exception:
-                pass
+            cache_data = trim_cache(cache_data, 50)
+            write_json_cache(cmd_cache_path, cache_data)
 
-        guard_failure_commands = set()
         for entry in failures.values():
             summary_single = entry.get("summary") or ""
-            summary_single = re.sub(r"\s+", " ", summary_single).strip()
+            summary_single = whitespace_run_pattern.sub(" ", summary_single).strip()
             if len(summary_single) > 240:
                 summary_single = summary_single[:237] + "..."
-            encoded_command = base64.b64encode(entry["command"].encode("utf-8")).decode("ascii")
-            encoded_summary = (
-                base64.b64encode(summary_single.encode("utf-8")).decode("ascii") if summary_single else ""
-            )
-            repeat_flag = 1 if entry.get("repeat") else 0
+            encoded_command = b64_field(entry["command"])
+            encoded_summary = b64_field(summary_single)
+            repeat_flag = "1" if entry.get("repeat") else "0"
             total_failures = entry.get("total_failures", entry["count"])
-            remediation_note = remediation_message(entry.get("command"), total_failures, entry.get("exit"))
             command_text_clean = (entry.get("command") or "").strip()
-            if command_text_clean:
+            # Only the first failure of a command gets a remediation note and
+            # a guard line, so later duplicates skip building the note.
+            if command_text_clean and command_text_clean not in failure_remediation_notes:
+                remediation_note = remediation_message(entry.get("command"), total_failures, entry.get("exit"))
                 failure_remediation_notes[command_text_clean] = remediation_note
-                if command_text_clean not in guard_failure_commands:
-                    issues = [remediation_note]
-                    if summary_single:
-                        issues.append(f"Last failure: {summary_single}")
-                    guard_digest_source = f"{project_root_hint}\n{command_text_clean}\nremediation"
-                    guard_digest = hashlib.sha256(guard_digest_source.encode("utf-8", "ignore")).hexdigest()[:12]
-                    encoded_guard_command = base64.b64encode(command_text_clean.encode("utf-8")).decode("ascii")
-                    encoded_guard_message = base64.b64encode("; ".join(issues).encode("utf-8")).decode("ascii")
-                    repeat_flag_guard = 1 if total_failures and total_failures > 1 else 0
-                    command_guard_lines.append(
-                        f"CMDGUARD\t{guard_digest}\t{repeat_flag_guard}\t{len(issues)}\t{encoded_guard_command}\t{encoded_guard_message}"
+                issues = [remediation_note]
+                if summary_single:
+                    issues.append(f"Last failure: {summary_single}")
+                guard_digest_source = f"{project_root_hint}\n{command_text_clean}\nremediation"
+                guard_digest = short_digest(guard_digest_source)
+                repeat_flag_guard = "1" if total_failures and total_failures > 1 else "0"
+                command_guard_lines.append(
+                    "\t".join(
+                        (
+                            "CMDGUARD",
+                            guard_digest,
+                            repeat_flag_guard,
+                            str(len(issues)),
+                            b64_field(command_text_clean),
+                            b64_field("; ".join(issues)),
+                        )
                     )
-                    guard_entries.append({
-                        "command": command_text_clean,
-                        "issues": issues,
-                    })
-                    guard_failure_commands.add(command_text_clean)
+                )
+                guard_entries.append({
+                    "command": command_text_clean,
+                    "issues": issues,
+                })
             command_failure_lines.append(
-                f"CMDFAIL\t{repeat_flag}\t{total_failures}\t{entry['exit']}\t{entry['digest']}\t{encoded_command}\t{encoded_summary}"
+                "\t".join(
+                    ("CMDFAIL", repeat_flag, str(total_failures), str(entry["exit"]), entry["digest"], encoded_command, encoded_summary)
+                )
             )
 
     if stream_sequences:
         stream_cache_data = {}
         if stream_cache_path:
-            try:
-                contents = stream_cache_path.read_text(encoding="utf-8")
-                stream_cache_data = json.loads(contents) if contents.strip() else {}
-                if not isinstance(stream_cache_data, dict):
-                    stream_cache_data = {}
-            except Exception:
-                stream_cache_data = {}
+            stream_cache_data = load_json_cache(stream_cache_path)
         for seq in stream_sequences:
             coverage_start = seq["coverage_start"]
             coverage_end = seq["coverage_end"]
@@ -1039,20 +1182,18 @@ def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
                 "to inspect slices without streaming entire files."
             )
             digest_source = f"{project_root_hint}\n{seq['file']}\n{coverage_start}-{coverage_end}"
-            digest = hashlib.sha256(digest_source.encode("utf-8", "ignore")).hexdigest()[:12]
+            digest = short_digest(digest_source)
             prev_count = 0
             repeat_flag = False
             existing_entry = None
             if stream_cache_path:
                 existing_entry = stream_cache_data.get(digest)
-                if isinstance(existing_entry, dict):
+                if existing_entry is not None:
                     try:
                         prev_count = int(existing_entry.get("count", 0))
                     except Exception:
                         prev_count = 0
                     repeat_flag = prev_count > 0
-                else:
-                    existing_entry = None
             new_count = prev_count + 1
             if stream_cache_path:
                 record_entry = existing_entry or {}
@@ -1066,67 +1207,49 @@ def normalise_candidate_path(raw: str, cwd: str) -> Optional[pathlib.Path]:
                 record_entry["advice"] = advice_text
                 record_entry["commands"] = command_examples
                 stream_cache_data[digest] = record_entry
-            encoded_summary = base64.b64encode(summary_text.encode("utf-8")).decode("ascii")
-            encoded_advice = base64.b64encode(advice_text.encode("utf-8")).decode("ascii") if advice_text else ""
-            repeat_flag_int = 1 if repeat_flag else 0
             command_stream_lines.append(
-                f"CMDSTREAM\t{digest}\t{repeat_flag_int}\t{new_count}\t{encoded_summary}\t{encoded_advice}"
+                "\t".join(
+                    ("CMDSTREAM", digest, "1" if repeat_flag else "0", str(new_count), b64_field(summary_text), b64_field(advice_text))
+                )
             )
         if stream_cache_path:
-            if len(stream_cache_data) > 50:
-                sorted_items = sorted(
-                    stream_cache_data.items(),
-                    key=lambda item: item[1].get("last_seen", ""),
-                    reverse=True,
-                )
-                stream_cache_data = dict(sorted_items[:50])
-            try:
-                stream_cache_path.parent.mkdir(parents=True, exist_ok=True)
-                stream_cache_path.write_text(json.dumps(stream_cache_data, indent=2), encoding="utf-8")
-            except Exception:
-                pass
+            stream_cache_data = trim_cache(stream_cache_data, 50)
+            write_json_cache(stream_cache_path, stream_cache_data)
 
-    if file_cache_path:
-        if len(file_cache_data) > 120:
-            sorted_items = sorted(
-                file_cache_data.items(),
-                key=lambda item: item[1].get("last_seen", ""),
-                reverse=True,
-            )
-            file_cache_data = dict(sorted_items[:120])
-        try:
-            file_cache_path.parent.mkdir(parents=True, exist_ok=True)
-            file_cache_path.write_text(json.dumps(file_cache_data, indent=2), encoding="utf-8")
-        except Exception:
-            pass
+    if file_cache_path and file_cache_dirty:
+        file_cache_data = trim_cache(file_cache_data, 120)
+        write_json_cache(file_cache_path, file_cache_data)
 
 suppress_write = os.environ.get("GC_USAGE_SUPPRESS_WRITE", "").strip().lower() in {"1", "true", "yes", "on"}
 if not suppress_write:
     usage_path.parent.mkdir(parents=True, exist_ok=True)
-    with usage_path.open("a", encoding="utf-8") as fh:
-        fh.write(json.dumps(record, sort_keys=True, separators=(",", ":")))
-        fh.write("\n")
-
-for entry_line in command_failure_lines:
-    print(entry_line)
-
-for entry_line in command_stream_lines:
-    print(entry_line)
-
-for entry_line in command_scan_lines:
-    print(entry_line)
-
-for entry_line in command_guard_lines:
-    print(entry_line)
+    # One unbuffered O_APPEND write per record keeps lines from concurrent
+    # recorders from interleaving.
+    usage_fd = os.open(usage_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND | os.O_CLOEXEC, 0o644)
+    try:
+        os.write(usage_fd, dump_json(record, sort_keys=True) + b"\n")
+    finally:
+        os.close(usage_fd)
 
-for entry_line in command_file_lines:
-    print(entry_line)
+# Everything goes out in one write rather than one print() per line. The
+# lines are ASCII apart from the limit message, so a single UTF-8 encode of
+# the joined text goes straight to the binary buffer.
+stdout_lines = [
+    *command_failure_lines,
+    *command_stream_lines,
+    *command_scan_lines,
+    *command_guard_lines,
+    *command_file_lines,
+]
 
 if fields:
     prompt_value = int(fields.get("prompt_tokens") or 0)
     completion_value = int(fields.get("completion_tokens") or 0)
     total_value = int(fields.get("total_tokens") or (prompt_value + completion_value))
-    print(f"USAGE\t{prompt_value}\t{completion_value}\t{total_value}")
+    stdout_lines.append(f"USAGE\t{prompt_value}\t{completion_value}\t{total_value}")
 
 if limit_message:
-    print(f"LIMIT_DETECTED\t{limit_message}")
+    stdout_lines.append(f"LIMIT_DETECTED\t{limit_message}")
+
+if stdout_lines:
+    sys.stdout.buffer.write(("\n".join(stdout_lines) + "\n").encode("utf-8"))
@@ -1,13 +1,15 @@
 import json
 import os
-import re
 import sqlite3
 import sys
 import time
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Iterable, Optional, Tuple
 
-from task_binder import update_after_progress as binder_update_after_progress
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None  # type: ignore[assignment]
 
 TERMINAL_LOCK_STATUSES = {
     "complete",
@@ -21,6 +23,153 @@ TERMINAL_LOCK_STATUSES = {
     "skipped-already-complete",
 }
 
+# Columns added to pre-existing tables after their first release.
+TASK_PROGRESS_COLUMNS = (
+    ("tokens_retrieve", "INTEGER"),
+    ("tokens_plan", "INTEGER"),
+    ("tokens_patch", "INTEGER"),
+    ("tokens_verify", "INTEGER"),
+    ("tokens_per_sp", "REAL"),
+    ("story_points", "REAL"),
+    ("hotspot_phase", "TEXT"),
+    ("tokens_prompt_estimate", "INTEGER"),
+    ("llm_prompt_tokens", "INTEGER"),
+    ("llm_completion_tokens", "INTEGER"),
+    ("verify_status", "TEXT"),
+    ("verify_summary", "TEXT"),
+    ("verify_report", "TEXT"),
+    ("verify_details", "TEXT"),
+    ("meta_plan_flag", "INTEGER"),
+    ("meta_focus_flag", "INTEGER"),
+    ("meta_no_changes_flag", "INTEGER"),
+    ("meta_already_flag", "INTEGER"),
+    ("commit_sha", "TEXT"),
+    ("commit_status", "TEXT"),
+    ("push_status", "TEXT"),
+    ("push_remote", "TEXT"),
+    ("push_branch", "TEXT"),
+    ("push_error", "TEXT"),
+    ("attempt_signature", "TEXT"),
+    ("changes_count", "INTEGER"),
+    ("outcome_reason", "TEXT"),
+)
+
+TASKS_COLUMNS = (
+    ("last_log_path", "TEXT"),
+    ("last_prompt_path", "TEXT"),
+    ("last_output_path", "TEXT"),
+    ("last_attempts", "INTEGER"),
+    ("last_tokens_total", "INTEGER"),
+    ("last_prompt_tokens_estimate", "INTEGER"),
+    ("last_llm_prompt_tokens", "INTEGER"),
+    ("last_llm_completion_tokens", "INTEGER"),
+    ("last_duration_seconds", "INTEGER"),
+    ("last_apply_status", "TEXT"),
+    ("last_changes_applied", "INTEGER"),
+    ("last_notes_json", "TEXT"),
+    ("last_written_json", "TEXT"),
+    ("last_patched_json", "TEXT"),
+    ("last_commands_json", "TEXT"),
+    ("last_progress_at", "TEXT"),
+    ("last_progress_run", "TEXT"),
+    ("status_reason", "TEXT"),
+    ("locked_by_migration", "INTEGER DEFAULT 0"),
+    ("migration_epoch", "INTEGER DEFAULT 0"),
+    ("locked_by", "TEXT"),
+    ("doc_refs", "TEXT"),
+    ("last_verified_commit", "TEXT"),
+    ("last_tokens_retrieve", "INTEGER"),
+    ("last_tokens_plan", "INTEGER"),
+    ("last_tokens_patch", "INTEGER"),
+    ("last_tokens_verify", "INTEGER"),
+    ("last_tokens_per_sp", "REAL"),
+    ("last_story_points", "REAL"),
+    ("last_hotspot_phase", "TEXT"),
+    ("last_verify_status", "TEXT"),
+    ("last_verify_summary", "TEXT"),
+    ("last_verify_report", "TEXT"),
+    ("last_verify_details", "TEXT"),
+    ("meta_plan_flag", "INTEGER DEFAULT 0"),
+    ("meta_focus_flag", "INTEGER DEFAULT 0"),
+    ("meta_no_changes_flag", "INTEGER DEFAULT 0"),
+    ("meta_already_flag", "INTEGER DEFAULT 0"),
+    ("last_commit_sha", "TEXT"),
+    ("last_commit_status", "TEXT"),
+    ("last_push_status", "TEXT"),
+    ("last_push_remote", "TEXT"),
+    ("last_push_branch", "TEXT"),
+    ("last_push_error", "TEXT"),
+    ("last_attempt_signature", "TEXT"),
+    ("last_changes_count", "INTEGER"),
+    ("last_outcome_reason", "TEXT"),
+    ("progress_state", "TEXT"),
+    ("progress_state_updated_at", "TEXT"),
+)
+
+# tasks columns refreshed on every progress record, in bind order.
+TASKS_UPDATE_COLUMNS = (
+    "last_log_path",
+    "last_prompt_path",
+    "last_output_path",
+    "last_attempts",
+    "last_tokens_total",
+    "last_prompt_tokens_estimate",
+    "last_llm_prompt_tokens",
+    "last_llm_completion_tokens",
+    "last_duration_seconds",
+    "last_apply_status",
+    "last_changes_applied",
+    "last_notes_json",
+    "last_written_json",
+    "last_patched_json",
+    "last_commands_json",
+    "last_progress_at",
+    "last_progress_run",
+    "last_tokens_retrieve",
+    "last_tokens_plan",
+    "last_tokens_patch",
+    "last_tokens_verify",
+    "last_tokens_per_sp",
+    "last_story_points",
+    "last_hotspot_phase",
+    "last_verify_status",
+    "last_verify_summary",
+    "last_verify_report",
+    "last_verify_details",
+    "meta_plan_flag",
+    "meta_focus_flag",
+    "meta_no_changes_flag",
+    "meta_already_flag",
+    "last_commit_sha",
+    "last_commit_status",
+    "last_push_status",
+    "last_push_remote",
+    "last_push_branch",
+    "last_push_error",
+    "last_attempt_signature",
+    "last_changes_count",
+    "last_outcome_reason",
+    "updated_at",
+)
+
+# The UPDATE text for each (progress_state set, status_reason set) combination,
+# built once so every call hands SQLite one of four identical statements.
+TASKS_UPDATE_SQL = {
+    (with_state, with_reason): "UPDATE tasks SET "
+    + ", ".join(
+        f"{column} = ?"
+        for column in TASKS_UPDATE_COLUMNS
+        + (("progress_state", "progress_state_updated_at") if with_state else ())
+        + (("status_reason",) if with_reason else ())
+    )
+    + " WHERE id = ?"
+    for with_state in (False, True)
+    for with_reason in (False, True)
+}
+
+# Accepted values for the GC_SQLITE_SYNC override of PRAGMA synchronous.
+SQLITE_SYNC_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
 
 def _is_blocked_dependency(status: Optional[str]) -> bool:
     return (status or "").strip().lower().startswith("blocked-dependency(")
@@ -46,28 +195,61 @@ def parse_points(value: Optional[str]) -> float:
     if not text:
         return 0.0
     normalized = text.lower().replace(",", ".")
-    match = re.search(r"-?\d+(?:\.\d+)?", normalized)
-    if not match:
+    if normalized.isdecimal():
+        # The usual case: a bare whole number such as "3" or "13".
+        return float(normalized) or 0.0
+    # Otherwise take the first signed decimal, i.e. what -?\d+(?:\.\d+)?
+    # would find: "-" only counts when a digit follows it, and "." only
+    # when digits follow it.
+    length = len(normalized)
+    start = 0
+    while start < length:
+        char = normalized[start]
+        if char.isdecimal() or (char == "-" and normalized[start + 1 : start + 2].isdecimal()):
+            break
+        start += 1
+    else:
         return 0.0
+    end = start + 1
+    while end < length and normalized[end].isdecimal():
+        end += 1
+    if normalized[end : end + 1] == "." and normalized[end + 1 : end + 2].isdecimal():
+        end += 2
+        while end < length and normalized[end].isdecimal():
+            end += 1
     try:
-        points = float(match.group(0))
-    except (TypeError, ValueError):
+        points = float(normalized[start:end])
+    except ValueError:
         return 0.0
     return points if points > 0 else 0.0
 
 
-def as_json(text: str) -> Optional[str]:
-    items = [line.strip() for line in text.splitlines() if line.strip()]
-    return json.dumps(items, ensure_ascii=False) if items else None
-
-
 def split_lines(text: str) -> list[str]:
-    return [line.strip() for line in text.splitlines() if line.strip()]
+    return [line for line in (raw.strip() for raw in text.splitlines()) if line]
 
 
-def ensure_column(cur: sqlite3.Cursor, table: str, column: str, definition: str) -> None:
-    cur.execute(f"PRAGMA table_info({table})")
-    if not any(row["name"] == column for row in cur.fetchall()):
+def as_json(items: list[str]) -> Optional[str]:
+    if not items:
+        return None
+    if orjson is not None:
+        try:
+            return orjson.dumps(items).decode("utf-8")
+        except TypeError:
+            # orjson rejects lone surrogates (undecodable argv bytes); json does not.
+            pass
+    return json.dumps(items, ensure_ascii=False)
+
+
+def ensure_columns(cur: sqlite3.Cursor, table: str, specs: Iterable[Tuple[str, str]]) -> None:
+    # One PRAGMA per table; the ALTERs below can only add the missing names,
+    # so the schema does not need to be re-read between them. The probe reads
+    # plain tuples (column 1 is the name); the Row factory is only needed for
+    # the task lookup.
+    probe = cur.connection.cursor()
+    probe.row_factory = None
+    existing = frozenset(row[1] for row in probe.execute(f"PRAGMA table_info({table})"))
+    missing = [(column, definition) for column, definition in specs if column not in existing]
+    for column, definition in missing:
         cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
 
 
@@ -132,36 +314,30 @@ def record_task_progress(
     prompt_path = (prompt_path or "").strip() or None
     output_path = (output_path or "").strip() or None
     apply_status = (apply_status or "").strip() or None
-    notes_text = notes_text or ""
-    written_text = written_text or ""
-    patched_text = patched_text or ""
-    commands_text = commands_text or ""
+    # Each multi-line field is split once; the same lists feed the JSON
+    # columns and the binder.
+    notes_lines = split_lines(notes_text or "")
+    written_lines = split_lines(written_text or "")
+    patched_lines = split_lines(patched_text or "")
+    commands_lines = split_lines(commands_text or "")
     observation_hash = (observation_hash or "").strip()
 
-    def _append_reference_note(body: str, marker: str) -> str:
-        marker = marker.strip()
-        if not marker:
-            return body
-        lines = [line.strip() for line in body.splitlines() if line.strip()]
-        if marker in lines:
-            return body
-        lines.append(marker)
-        return "\n".join(lines)
-
-    if log_path and log_path.strip():
-        notes_text = _append_reference_note(notes_text, f"Progress log archived at {log_path.strip()}")
+    if log_path:
+        marker = f"Progress log archived at {log_path}"
+        if marker not in notes_lines:
+            notes_lines.append(marker)
 
-    notes_json = as_json(notes_text)
-    written_json = as_json(written_text)
-    patched_json = as_json(patched_text)
-    commands_json = as_json(commands_text)
+    notes_json = as_json(notes_lines)
+    written_json = as_json(written_lines)
+    patched_json = as_json(patched_lines)
+    commands_json = as_json(commands_lines)
 
     timestamp = (occurred_at or "").strip()
     if not timestamp:
         timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
     status_lower = status_value.lower()
-    apply_status_lower = (apply_status or "").lower() if apply_status else ""
+    apply_status_lower = apply_status.lower() if apply_status else ""
 
     tokens_retrieve_int = parse_int(stage_tokens_retrieve) or 0
     tokens_plan_int = parse_int(stage_tokens_plan) or 0
@@ -222,9 +398,16 @@ def record_task_progress(
     elif status_lower:
         progress_state_value = status_lower
 
-    conn = sqlite3.connect(str(db_path))
+    # Autocommit mode with one explicit transaction: the DDL checks and the
+    # writes below share a single commit (and a single WAL sync).
+    conn = sqlite3.connect(str(db_path), isolation_level=None)
     conn.row_factory = sqlite3.Row
     cur = conn.cursor()
+    cur.execute("PRAGMA journal_mode = WAL")
+    sync_mode = os.getenv("GC_SQLITE_SYNC", "").strip().upper()
+    cur.execute(f"PRAGMA synchronous = {sync_mode if sync_mode in SQLITE_SYNC_MODES else 'NORMAL'}")
+    cur.execute("PRAGMA temp_store = MEMORY")
+    cur.execute("BEGIN IMMEDIATE")
 
     cur.execute(
         """
@@ -265,89 +448,9 @@ def record_task_progress(
         """
     )
 
-    for column, definition in (
-        ("tokens_retrieve", "INTEGER"),
-        ("tokens_plan", "INTEGER"),
-        ("tokens_patch", "INTEGER"),
-        ("tokens_verify", "INTEGER"),
-        ("tokens_per_sp", "REAL"),
-        ("story_points", "REAL"),
-        ("hotspot_phase", "TEXT"),
-        ("tokens_prompt_estimate", "INTEGER"),
-        ("llm_prompt_tokens", "INTEGER"),
-        ("llm_completion_tokens", "INTEGER"),
-        ("verify_status", "TEXT"),
-        ("verify_summary", "TEXT"),
-        ("verify_report", "TEXT"),
-        ("verify_details", "TEXT"),
-        ("meta_plan_flag", "INTEGER"),
-        ("meta_focus_flag", "INTEGER"),
-        ("meta_no_changes_flag", "INTEGER"),
-        ("meta_already_flag", "INTEGER"),
-        ("commit_sha", "TEXT"),
-        ("commit_status", "TEXT"),
-        ("push_status", "TEXT"),
-        ("push_remote", "TEXT"),
-        ("push_branch", "TEXT"),
-        ("push_error", "TEXT"),
-        ("attempt_signature", "TEXT"),
-        ("changes_count", "INTEGER"),
-        ("outcome_reason", "TEXT"),
-    ):
-        ensure_column(cur, "task_progress", column, definition)
-
-    for column, definition in (
-        ("last_log_path", "TEXT"),
-        ("last_prompt_path", "TEXT"),
-        ("last_output_path", "TEXT"),
-        ("last_attempts", "INTEGER"),
-        ("last_tokens_total", "INTEGER"),
-        ("last_prompt_tokens_estimate", "INTEGER"),
-        ("last_llm_prompt_tokens", "INTEGER"),
-        ("last_llm_completion_tokens", "INTEGER"),
-        ("last_duration_seconds", "INTEGER"),
-        ("last_apply_status", "TEXT"),
-        ("last_changes_applied", "INTEGER"),
-        ("last_notes_json", "TEXT"),
-        ("last_written_json", "TEXT"),
-        ("last_patched_json", "TEXT"),
-        ("last_commands_json", "TEXT"),
-        ("last_progress_at", "TEXT"),
-        ("last_progress_run", "TEXT"),
-        ("status_reason", "TEXT"),
-        ("locked_by_migration", "INTEGER DEFAULT 0"),
-        ("migration_epoch", "INTEGER DEFAULT 0"),
-        ("locked_by", "TEXT"),
-        ("doc_refs", "TEXT"),
-        ("last_verified_commit", "TEXT"),
-        ("last_tokens_retrieve", "INTEGER"),
-        ("last_tokens_plan", "INTEGER"),
-        ("last_tokens_patch", "INTEGER"),
-        ("last_tokens_verify", "INTEGER"),
-        ("last_tokens_per_sp", "REAL"),
-        ("last_story_points", "REAL"),
-        ("last_hotspot_phase", "TEXT"),
-        ("last_verify_status", "TEXT"),
-        ("last_verify_summary", "TEXT"),
-        ("last_verify_report", "TEXT"),
-        ("last_verify_details", "TEXT"),
-        ("meta_plan_flag", "INTEGER DEFAULT 0"),
-        ("meta_focus_flag", "INTEGER DEFAULT 0"),
-        ("meta_no_changes_flag", "INTEGER DEFAULT 0"),
-        ("meta_already_flag", "INTEGER DEFAULT 0"),
-        ("last_commit_sha", "TEXT"),
-        ("last_commit_status", "TEXT"),
-        ("last_push_status", "TEXT"),
-        ("last_push_remote", "TEXT"),
-        ("last_push_branch", "TEXT"),
-        ("last_push_error", "TEXT"),
-        ("last_attempt_signature", "TEXT"),
-        ("last_changes_count", "INTEGER"),
-        ("last_outcome_reason", "TEXT"),
-        ("progress_state", "TEXT"),
-        ("progress_state_updated_at", "TEXT"),
-    ):
-        ensure_column(cur, "tasks", column, definition)
+    ensure_columns(cur, "task_progress", TASK_PROGRESS_COLUMNS)
+
+    ensure_columns(cur, "tasks", TASKS_COLUMNS)
 
     task_row = cur.execute(
         """
@@ -368,8 +471,6 @@ def record_task_progress(
     existing_status = (task_row["status"] or "").strip() if task_row else ""
     existing_status_lower = existing_status.lower()
     locked_by_migration = int(task_row["locked_by_migration"] or 0) if task_row else 0
-    status_lower = status_value.lower()
-    apply_status_lower = (apply_status or "").strip().lower() if apply_status else ""
     status_reason_update = None
 
     if apply_status_lower in {"empty-apply", "invalid-json", "no-output"}:
@@ -466,70 +567,57 @@ def record_task_progress(
         progress_row,
     )
 
-    task_updates = []
-    params = []
-
-    def set_field(column: str, value) -> None:
-        task_updates.append(f"{column} = ?")
-        params.append(value)
-
-    set_field("last_log_path", log_path)
-    set_field("last_prompt_path", prompt_path)
-    set_field("last_output_path", output_path)
-    set_field("last_attempts", attempts_int)
-    set_field("last_tokens_total", tokens_int)
-    set_field("last_prompt_tokens_estimate", tokens_estimate_int)
-    set_field("last_llm_prompt_tokens", llm_prompt_tokens_int)
-    set_field("last_llm_completion_tokens", llm_completion_tokens_int)
-    set_field("last_duration_seconds", duration_int)
-    set_field("last_apply_status", apply_status)
-    set_field("last_changes_applied", changes_int)
-    set_field("last_notes_json", notes_json)
-    set_field("last_written_json", written_json)
-    set_field("last_patched_json", patched_json)
-    set_field("last_commands_json", commands_json)
-    set_field("last_progress_at", timestamp)
-    set_field("last_progress_run", run_stamp)
-    set_field("last_tokens_retrieve", tokens_retrieve_int)
-    set_field("last_tokens_plan", tokens_plan_int)
-    set_field("last_tokens_patch", tokens_patch_int)
-    set_field("last_tokens_verify", tokens_verify_int)
-    set_field("last_tokens_per_sp", tokens_per_sp_value)
-    set_field("last_story_points", story_points_value)
-    set_field("last_hotspot_phase", hotspot_phase)
-    set_field("last_verify_status", verify_status_value)
-    set_field("last_verify_summary", verify_summary_value)
-    set_field("last_verify_report", verify_report_value)
-    set_field("last_verify_details", verify_details_value)
-    set_field("meta_plan_flag", meta_plan_int)
-    set_field("meta_focus_flag", meta_focus_int)
-    set_field("meta_no_changes_flag", meta_no_changes_int)
-    set_field("meta_already_flag", meta_already_int)
-    set_field("last_commit_sha", commit_sha_value)
-    set_field("last_commit_status", commit_status_value)
-    set_field("last_push_status", push_status_value)
-    set_field("last_push_remote", push_remote_value)
-    set_field("last_push_branch", push_branch_value)
-    set_field("last_push_error", push_error_value)
-    set_field("last_attempt_signature", attempt_signature_value)
-    set_field("last_changes_count", changes_count_int)
-    set_field("last_outcome_reason", outcome_reason_value)
-    if progress_state_value:
-        set_field("progress_state", progress_state_value)
-        set_field("progress_state_updated_at", timestamp)
-    set_field("updated_at", timestamp)
-    if status_reason_update:
-        set_field("status_reason", status_reason_update)
-
     if task_row:
-        cur.execute(
-            f"""
-            UPDATE tasks
-               SET {", ".join(task_updates)}
-             WHERE id = ?
-            """,
-            params + [task_id],
-        )
+        params = [
+            log_path,
+            prompt_path,
+            output_path,
+            attempts_int,
+            tokens_int,
+            tokens_estimate_int,
+            llm_prompt_tokens_int,
+            llm_completion_tokens_int,
+            duration_int,
+            apply_status,
+            changes_int,
+            notes_json,
+            written_json,
+            patched_json,
+            commands_json,
+            timestamp,
+            run_stamp,
+            tokens_retrieve_int,
+            tokens_plan_int,
+            tokens_patch_int,
+            tokens_verify_int,
+            tokens_per_sp_value,
+            story_points_value,
+            hotspot_phase,
+            verify_status_value,
+            verify_summary_value,
+            verify_report_value,
+            verify_details_value,
+            meta_plan_int,
+            meta_focus_int,
+            meta_no_changes_int,
+            meta_already_int,
+            commit_sha_value,
+            commit_status_value,
+            push_status_value,
+            push_remote_value,
+            push_branch_value,
+            push_error_value,
+            attempt_signature_value,
+            changes_count_int,
+            outcome_reason_value,
+            timestamp,
+        ]
+        if progress_state_value:
+            params += [progress_state_value, timestamp]
+        if status_reason_update:
+            params.append(status_reason_update)
+        params.append(task_id)
+        cur.execute(TASKS_UPDATE_SQL[bool(progress_state_value), bool(status_reason_update)], params)
 
     binder_enabled = os.getenv("GC_BINDER_ENABLED", "").strip().lower() not in {"0", "false", "no", "off"}
     if binder_enabled and task_row:
@@ -551,6 +639,9 @@ def record_task_progress(
             if output_hint in {"(missing)", "(discarded)", ""}:
                 output_hint = ""
 
+            # Imported here so runs with the binder disabled never load it.
+            from task_binder import update_after_progress as binder_update_after_progress
+
             binder_update_after_progress(
                 Path(project_root),
                 epic_slug=task_row.get("epic_key") or "",
@@ -558,9 +649,9 @@ def record_task_progress(
                 task_id=task_row.get("task_id") or f"{story_slug}:{position_int}",
                 status=final_status or "",
                 apply_status=apply_status,
-                notes=split_lines(notes_text),
-                written_paths=split_lines(written_text),
-                patched_paths=split_lines(patched_text),
+                notes=notes_lines,
+                written_paths=written_lines,
+                patched_paths=patched_lines,
                 tokens_total=tokens_int,
                 run_stamp=run_stamp,
                 reopened_by_migration=binder_reopened,
@@ -593,105 +684,78 @@ def record_task_progress(
         except sqlite3.DatabaseError:
             pass
 
-    conn.commit()
+    cur.execute("COMMIT")
     conn.close()
 
 
+# record_task_progress keyword arguments, in positional argv order.
+RECORD_FIELDS = (
+    "db_path",
+    "story_slug",
+    "position",
+    "run_stamp",
+    "status",
+    "log_path",
+    "prompt_path",
+    "output_path",
+    "attempts",
+    "tokens_total",
+    "tokens_estimate",
+    "llm_prompt_tokens",
+    "llm_completion_tokens",
+    "duration_seconds",
+    "apply_status",
+    "changes_applied",
+    "notes_text",
+    "written_text",
+    "patched_text",
+    "commands_text",
+    "observation_hash",
+    "occurred_at",
+    "stage_tokens_retrieve",
+    "stage_tokens_plan",
+    "stage_tokens_patch",
+    "stage_tokens_verify",
+    "story_points_raw",
+    "verify_status",
+    "verify_summary",
+    "verify_report",
+    "verify_details",
+    "meta_plan_flag",
+    "meta_focus_flag",
+    "meta_no_changes_flag",
+    "meta_already_flag",
+    "commit_sha",
+    "commit_status",
+    "push_status",
+    "push_remote",
+    "push_branch",
+    "push_error",
+    "attempt_signature",
+    "changes_count",
+    "outcome_reason",
+)
+
+
 def main() -> int:
-    if len(sys.argv) < 45:
+    # "record_task_progress.py -" reads the fields as one JSON object on stdin;
+    # otherwise they arrive as 44 positional arguments.
+    if len(sys.argv) == 2 and sys.argv[1] == "-":
+        try:
+            payload = json.loads(sys.stdin.buffer.read() or b"{}")
+        except ValueError:
+            return 1
+        if not isinstance(payload, dict):
+            return 1
+        values = ["" if payload.get(name) is None else str(payload[name]) for name in RECORD_FIELDS]
+    elif len(sys.argv) >= 45:
+        values = sys.argv[1:45]
+    else:
         return 1
 
-    db_path = Path(sys.argv[1])
-    story_slug = sys.argv[2]
-    position = sys.argv[3]
-    run_stamp = sys.argv[4]
-    status = sys.argv[5]
-    log_path = sys.argv[6]
-    prompt_path = sys.argv[7]
-    output_path = sys.argv[8]
-    attempts = sys.argv[9]
-    tokens_total = sys.argv[10]
-    tokens_estimate = sys.argv[11]
-    llm_prompt_tokens = sys.argv[12]
-    llm_completion_tokens = sys.argv[13]
-    duration_seconds = sys.argv[14]
-    apply_status = sys.argv[15]
-    changes_applied = sys.argv[16]
-    notes_text = sys.argv[17]
-    written_text = sys.argv[18]
-    patched_text = sys.argv[19]
-    commands_text = sys.argv[20]
-    observation_hash = sys.argv[21]
-    occurred_at = sys.argv[22]
-    stage_tokens_retrieve = sys.argv[23]
-    stage_tokens_plan = sys.argv[24]
-    stage_tokens_patch = sys.argv[25]
-    stage_tokens_verify = sys.argv[26]
-    story_points_raw = sys.argv[27]
-    verify_status = sys.argv[28]
-    verify_summary = sys.argv[29]
-    verify_report = sys.argv[30]
-    verify_details = sys.argv[31]
-    meta_plan_flag = sys.argv[32]
-    meta_focus_flag = sys.argv[33]
-    meta_no_changes_flag = sys.argv[34]
-    meta_already_flag = sys.argv[35]
-    commit_sha = sys.argv[36]
-    commit_status = sys.argv[37]
-    push_status = sys.argv[38]
-    push_remote = sys.argv[39]
-    push_branch = sys.argv[40]
-    push_error = sys.argv[41]
-    attempt_signature = sys.argv[42]
-    changes_count = sys.argv[43]
-    outcome_reason = sys.argv[44]
-
-    record_task_progress(
-        db_path=db_path,
-        story_slug=story_slug,
-        position=position,
-        run_stamp=run_stamp,
-        status=status,
-        log_path=log_path,
-        prompt_path=prompt_path,
-        output_path=output_path,
-        attempts=attempts,
-        tokens_total=tokens_total,
-        tokens_estimate=tokens_estimate,
-        llm_prompt_tokens=llm_prompt_tokens,
-        llm_completion_tokens=llm_completion_tokens,
-        duration_seconds=duration_seconds,
-        apply_status=apply_status,
-        changes_applied=changes_applied,
-        notes_text=notes_text,
-        written_text=written_text,
-        patched_text=patched_text,
-        commands_text=commands_text,
-        observation_hash=observation_hash,
-        occurred_at=occurred_at,
-        stage_tokens_retrieve=stage_tokens_retrieve,
-        stage_tokens_plan=stage_tokens_plan,
-        stage_tokens_patch=stage_tokens_patch,
-        stage_tokens_verify=stage_tokens_verify,
-        story_points_raw=story_points_raw,
-        verify_status=verify_status,
-        verify_summary=verify_summary,
-        verify_report=verify_report,
-        verify_details=verify_details,
-        meta_plan_flag=meta_plan_flag,
-        meta_focus_flag=meta_focus_flag,
-        meta_no_changes_flag=meta_no_changes_flag,
-        meta_already_flag=meta_already_flag,
-        commit_sha=commit_sha,
-        commit_status=commit_status,
-        push_status=push_status,
-        push_remote=push_remote,
-        push_branch=push_branch,
-        push_error=push_error,
-        attempt_signature=attempt_signature,
-        changes_count=changes_count,
-        outcome_reason=outcome_reason,
-    )
+    fields = dict(zip(RECORD_FIELDS, values))
+    fields["db_path"] = Path(fields["db_path"])
+    record_task_progress(**fields)
     return 0
 
 
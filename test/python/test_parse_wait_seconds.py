@@ -0,0 +1,23 @@
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SCRIPTS_DIR = REPO_ROOT / "scripts" / "python"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import parse_wait_seconds
+
+
+def test_parse_wait_sums_units_case_insensitively():
+    assert parse_wait_seconds.parse_wait("Try again in 1 Hour 30 MINUTES and 5s") == 3600 + 1800 + 5
+    assert parse_wait_seconds.parse_wait("quota exceeded") == 0
+    assert parse_wait_seconds.parse_wait("") == 0
+
+
+def test_parse_wait_handles_non_ascii_text():
+    # Case folding must not turn these into units missing from UNITS.
+    assert parse_wait_seconds.parse_wait("Try again in 5ſ") == 0
+    assert parse_wait_seconds.parse_wait("wait 5 mİn") == 300
+    # Non-ASCII decimal digits still count, as \d matches them.
+    assert parse_wait_seconds.parse_wait("١٠ minutes") == 600
@@ -140,6 +140,166 @@ def test_progress_migration_idempotent_second_run(tmp_path):
     conn.close()
 
 
+def test_progress_migration_apply_reads_rows_under_write_lock(tmp_path, monkeypatch):
+    db_path = tmp_path / "tasks.db"
+    conn = _init_tasks_db(db_path)
+    conn.execute(
+        "INSERT INTO tasks (story_slug, position, task_id, title, status) VALUES (?,?,?,?,?)",
+        ("story-alpha", 0, "TASK-1", "Initial Task", "complete"),
+    )
+    conn.commit()
+    conn.close()
+
+    plan = progress_migration.plan_only(db_path, tmp_path / "plan.json")
+    fetch_current_rows = progress_migration._fetch_current_rows
+    concurrent_errors = []
+
+    def fetch_with_concurrent_writer(cur, task_ids):
+        assert cur.connection.in_transaction
+        other = sqlite3.connect(db_path, timeout=0)
+        try:
+            other.execute("UPDATE tasks SET status='pending' WHERE task_id='TASK-1'")
+            other.commit()
+        except sqlite3.OperationalError as exc:
+            concurrent_errors.append(exc)
+        finally:
+            other.close()
+        return fetch_current_rows(cur, task_ids)
+
+    monkeypatch.setattr(progress_migration, "_fetch_current_rows", fetch_with_concurrent_writer)
+    stats = progress_migration.apply_plan(db_path, plan, tmp_path / "map.ndjson")
+
+    assert concurrent_errors
+    assert stats["tasks_updated"] == 1
+    conn = sqlite3.connect(db_path)
+    row = conn.execute("SELECT status, locked_by_migration FROM tasks WHERE task_id='TASK-1'").fetchone()
+    assert row == ("complete", 1)
+    conn.close()
+
+
+def test_progress_migration_apply_keeps_plan_order_for_uid_swaps(tmp_path):
+    db_path = tmp_path / "tasks.db"
+    conn = _init_tasks_db(db_path)
+    claimed_uid = progress_migration._stable_uid("s", "T2", "Third", 2)
+    conn.executemany(
+        "INSERT INTO tasks (story_slug, position, task_id, title, status, uid) VALUES (?,?,?,?,?,?)",
+        [
+            ("s", 0, "T0", "First", "complete", None),
+            # T1 still holds the uid that T2 is remapped to; T1 must move first.
+            ("s", 1, "T1", "Second", "pending", claimed_uid),
+            ("s", 2, "T2", "Third", "complete", "old-uid"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    plan = progress_migration.plan_only(db_path, tmp_path / "plan.json")
+    stats = progress_migration.apply_plan(db_path, plan, tmp_path / "map.ndjson")
+
+    assert stats["tasks_updated"] == 3
+    conn = sqlite3.connect(db_path)
+    uids = dict(conn.execute("SELECT task_id, uid FROM tasks"))
+    conn.close()
+    assert uids["T2"] == claimed_uid
+    assert uids["T1"] == progress_migration._stable_uid("s", "T1", "Second", 1)
+
+
+def test_progress_migration_apply_flushes_audit_rows_during_the_loop(tmp_path, monkeypatch):
+    db_path = tmp_path / "tasks.db"
+    conn = _init_tasks_db(db_path)
+    conn.executemany(
+        "INSERT INTO tasks (story_slug, position, task_id, title, status) VALUES (?,?,?,?,?)",
+        [("story-alpha", position, f"TASK-{position}", f"Task {position}", "complete") for position in range(5)],
+    )
+    conn.commit()
+    conn.close()
+
+    plan = progress_migration.plan_only(db_path, tmp_path / "plan.json")
+    flush_audit = progress_migration._flush_audit
+    flushed_sizes = []
+
+    def recording_flush(cur, audit_rows, snapshot_rows):
+        flushed_sizes.append(len(audit_rows))
+        flush_audit(cur, audit_rows, snapshot_rows)
+
+    monkeypatch.setattr(progress_migration, "AUDIT_FLUSH_ROWS", 2)
+    monkeypatch.setattr(progress_migration, "_flush_audit", recording_flush)
+    stats = progress_migration.apply_plan(db_path, plan, None)
+
+    assert stats["tasks_updated"] == 5
+    assert flushed_sizes == [2, 2, 1]
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM progress_migration_audit").fetchone() == (5,)
+    assert conn.execute("SELECT COUNT(*) FROM progress_migration_snapshots").fetchone() == (5,)
+    assert conn.execute("SELECT COUNT(*) FROM tasks WHERE locked_by_migration = 1").fetchone() == (5,)
+    conn.close()
+
+
+def _plan_row(task_db_id, story, position, status="pending"):
+    # Column order of progress_migration._fetch_tasks.
+    return (
+        task_db_id,
+        story,
+        position,
+        f"TASK-{position}",
+        f"Task {position}",
+        status,
+        None,
+        None,
+        None,
+        None,
+        None,
+        0,
+        0,
+        None,
+    )
+
+
+def test_progress_migration_dataset_checksum_covers_every_row():
+    def checksum(rows):
+        return progress_migration._build_plan(rows, 1)["dataset_checksum"]
+
+    row = _plan_row(1, "story-alpha", 0)
+    # Identical row payloads must not cancel each other out.
+    assert checksum([row, row]) != checksum([])
+    assert checksum([row, row]) != checksum([row])
+    assert checksum([row]) == checksum([row])
+    assert checksum([row]) != checksum([_plan_row(1, "story-alpha", 0, status="complete")])
+
+
+def test_progress_migration_entries_checksum_ignores_scan_order():
+    def checksum(rows):
+        return progress_migration._build_plan(rows, 1)["entries_checksum"]
+
+    # Without UNIQUE(story_slug, position), ORDER BY story_slug, position may
+    # return duplicate or NULL positions in any order.
+    first = _plan_row(1, "story-alpha", 0)
+    second = _plan_row(2, "story-alpha", 0)
+    unpositioned = _plan_row(3, "story-alpha", None)
+    assert checksum([second, first]) == checksum([first, second])
+    assert checksum([first, unpositioned]) == checksum([unpositioned, first])
+
+
+def test_progress_migration_plan_leaves_no_checksum_state(tmp_path):
+    db_path = tmp_path / "tasks.db"
+    conn = _init_tasks_db(db_path)
+    conn.execute(
+        "INSERT INTO tasks (story_slug, position, task_id, title, status) VALUES (?,?,?,?,?)",
+        ("story-alpha", 0, "TASK-1", "Initial Task", "pending"),
+    )
+    conn.commit()
+    conn.close()
+
+    plan_path = tmp_path / "plan.json"
+    first = progress_migration.plan_only(db_path, plan_path)
+    assert progress_migration.plan_only(db_path, plan_path)["dataset_checksum"] == first["dataset_checksum"]
+
+    conn = sqlite3.connect(db_path)
+    tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    assert not tables & {"task_row_hash", "dataset_checksum_state"}
+
+
 def test_update_task_state_respects_locked(tmp_path):
     db_path = tmp_path / "state.db"
     conn = _init_tasks_db(db_path)
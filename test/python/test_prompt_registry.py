@@ -0,0 +1,82 @@
+import os
+import shutil
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SCRIPTS_DIR = REPO_ROOT / "scripts" / "python"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import prompt_registry
+
+
+def test_parse_source_env_sees_directories_created_later(tmp_path):
+    (tmp_path / "src" / "prompts").mkdir(parents=True)
+    first = prompt_registry.parse_source_env(tmp_path, None)
+    assert [label for label, _path in first] == ["prompts"]
+
+    (tmp_path / "docs").mkdir()
+    second = prompt_registry.parse_source_env(tmp_path, None)
+    assert [label for label, _path in second] == ["prompts", "docs"]
+
+    (tmp_path / "notes.md").write_text("not a directory", encoding="utf-8")
+    assert prompt_registry.parse_source_env(tmp_path, "notes.md:missing") == []
+
+
+def _build_registry(tmp_path):
+    source = tmp_path / "docs"
+    source.mkdir()
+    (source / "guide.md").write_text("# Guide\n", encoding="utf-8")
+    registry = tmp_path / "registry"
+    sources = prompt_registry.parse_source_env(tmp_path, None)
+    prompt_registry.ensure_prompt_registry(tmp_path, registry_dir=registry, source_dirs=sources)
+    return source, registry, sources
+
+
+def _age(path, seconds):
+    stat_result = os.stat(path)
+    os.utime(path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns - seconds * 1_000_000_000))
+
+
+def test_registry_skips_unchanged_sources(tmp_path, monkeypatch):
+    source, registry, sources = _build_registry(tmp_path)
+    # Rebuild with the source directory clearly older than the manifest.
+    _age(source, 60)
+    (registry / prompt_registry.REGISTRY_MANIFEST_NAME).unlink()
+    prompt_registry.ensure_prompt_registry(tmp_path, registry_dir=registry, source_dirs=sources)
+
+    calls = []
+    index_source = prompt_registry._index_source
+    monkeypatch.setattr(
+        prompt_registry, "_index_source", lambda *args, **kwargs: calls.append(args) or index_source(*args, **kwargs)
+    )
+    prompt_registry.ensure_prompt_registry(tmp_path, registry_dir=registry, source_dirs=sources)
+    assert calls == []
+
+
+def test_registry_rescans_directories_changed_within_the_manifest_tick(tmp_path):
+    source, registry, sources = _build_registry(tmp_path)
+    # On a coarse-timestamp filesystem a file added in the same tick as the
+    # scan leaves the directory mtime unchanged.
+    recorded_ns = os.stat(source).st_mtime_ns
+    (source / "late.md").write_text("# Late\n", encoding="utf-8")
+    os.utime(source, ns=(recorded_ns, recorded_ns))
+
+    prompt_registry.ensure_prompt_registry(tmp_path, registry_dir=registry, source_dirs=sources)
+    assert os.path.lexists(registry / "docs" / "late.md")
+
+
+def test_registry_restores_links_deleted_externally(tmp_path):
+    source, registry, sources = _build_registry(tmp_path)
+    _age(source, 60)
+    (registry / prompt_registry.REGISTRY_MANIFEST_NAME).unlink()
+    prompt_registry.ensure_prompt_registry(tmp_path, registry_dir=registry, source_dirs=sources)
+
+    (registry / "docs" / "guide.md").unlink()
+    prompt_registry.ensure_prompt_registry(tmp_path, registry_dir=registry, source_dirs=sources)
+    assert (registry / "docs" / "guide.md").read_text(encoding="utf-8") == "# Guide\n"
+
+    shutil.rmtree(registry / "docs")
+    prompt_registry.ensure_prompt_registry(tmp_path, registry_dir=registry, source_dirs=sources)
+    assert (registry / "docs" / "guide.md").read_text(encoding="utf-8") == "# Guide\n"
@@ -0,0 +1,110 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SCRIPTS_DIR = REPO_ROOT / "scripts" / "python"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import record_task_progress
+
+SCRIPT = SCRIPTS_DIR / "record_task_progress.py"
+
+
+def _init_tasks_db(db_path: Path) -> None:
+    conn = sqlite3.connect(db_path)
+    conn.executescript(
+        """
+        CREATE TABLE tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            story_slug TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            task_id TEXT,
+            title TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            epic_key TEXT,
+            updated_at TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            UNIQUE(story_slug, position)
+        );
+        INSERT INTO tasks (story_slug, position, task_id, title, updated_at, created_at)
+        VALUES ('story-alpha', 0, 'TASK-1', 'First', '2024-12-31T00:00:00Z', '2024-12-31T00:00:00Z');
+        """
+    )
+    conn.close()
+
+
+def _run(args: list[str], stdin: str | None = None) -> subprocess.CompletedProcess[str]:
+    env = dict(os.environ, GC_BINDER_ENABLED="0")
+    return subprocess.run(
+        [sys.executable, str(SCRIPT), *args],
+        input=stdin,
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+
+
+def _dump_rows(db_path: Path) -> dict[str, list[tuple]]:
+    conn = sqlite3.connect(db_path)
+    try:
+        return {
+            table: conn.execute(f"SELECT * FROM {table} ORDER BY id").fetchall()
+            for table in ("tasks", "task_progress")
+        }
+    finally:
+        conn.close()
+
+
+def test_record_task_progress_stdin_json_matches_positional(tmp_path: Path):
+    fields = {name: "" for name in record_task_progress.RECORD_FIELDS}
+    fields.update(
+        story_slug="story-alpha",
+        position="0",
+        run_stamp="run-1",
+        status="complete",
+        attempts="2",
+        tokens_total="120",
+        apply_status="applied",
+        changes_applied="true",
+        notes_text="note",
+        occurred_at="2025-01-01T00:00:00Z",
+        verify_status="passed",
+        commit_sha="abc123",
+        changes_count="3",
+    )
+
+    positional_db = tmp_path / "positional.db"
+    _init_tasks_db(positional_db)
+    fields["db_path"] = str(positional_db)
+    result = _run([fields[name] for name in record_task_progress.RECORD_FIELDS])
+    assert result.returncode == 0, result.stderr
+
+    stdin_db = tmp_path / "stdin.db"
+    _init_tasks_db(stdin_db)
+    payload = dict(fields, db_path=str(stdin_db), attempts=2, tokens_total=120, push_error=None)
+    del payload["outcome_reason"]
+    result = _run(["-"], stdin=json.dumps(payload))
+    assert result.returncode == 0, result.stderr
+
+    positional_rows = _dump_rows(positional_db)
+    assert len(positional_rows["task_progress"]) == 1
+    assert _dump_rows(stdin_db) == positional_rows
+
+
+def test_record_task_progress_stdin_rejects_non_object(tmp_path: Path):
+    db_path = tmp_path / "tasks.db"
+    _init_tasks_db(db_path)
+
+    assert _run(["-"], stdin="[1, 2]").returncode == 1
+    assert _run(["-"], stdin="{not json").returncode == 1
+    conn = sqlite3.connect(db_path)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    finally:
+        conn.close()
+    assert "task_progress" not in tables